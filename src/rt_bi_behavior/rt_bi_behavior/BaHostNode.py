@@ -0,0 +1,121 @@
+from json import loads
+
+from ament_index_python.packages import get_package_share_directory
+from rclpy.parameter import Parameter
+
+from rt_bi_behavior import package_name
+from rt_bi_behavior.BaNode import BaNode
+from rt_bi_behavior.Model.BehaviorIGraph import BehaviorIGraph
+from rt_bi_behavior.Model.PropositionalBA import PropositionalBA
+from rt_bi_commons.Base.ColdStartableNode import ColdStartable, ColdStartPayload
+from rt_bi_commons.Base.RtBiNode import RtBiNode
+from rt_bi_commons.Shared.IGraphDelta import IGraphDelta
+from rt_bi_commons.Shared.NodeId import NodeId
+from rt_bi_commons.Utils import Ros
+from rt_bi_commons.Utils.Msgs import Msgs
+from rt_bi_commons.Utils.RtBiInterfaces import RtBiInterfaces
+
+
+class BaHostNode(ColdStartable):
+	"""
+	Hosts many Behavior Automata in one node.
+	Every I-graph update is decoded once, into a single mirror of the I-graph,
+	whose memoized truth table is shared by all automata.
+	The automata are listed in the `specs` parameter, and each one is defined by the
+	:class:`rt_bi_behavior.BaNode.BaSpec` parameters nested under its name, e.g. `spec_name.states`.
+	"""
+	def __init__(self, **kwArgs) -> None:
+		""" Create a Behavior Automata host node. """
+		newKw = { "node_name": "ba_host", "loggingSeverity": Ros.LoggingSeverity.WARN, **kwArgs}
+		RtBiNode.__init__(self, **newKw)
+		ColdStartable.__init__(self)
+		self.__baseDir = get_package_share_directory(package_name)
+		self.__grammarDir: str = ""
+		self.__grammarFile: str = ""
+		self.__specNames: list[str] = []
+		self.__intraProcess = False
+		self.__engine: type[PropositionalBA] = PropositionalBA
+		self.declareParameters()
+		self.parseParameters()
+		self.__automata: list[PropositionalBA] = []
+		for specName in self.__specNames:
+			self.__automata.append(self.__engine(
+				f"{self.get_fully_qualified_name()}/{specName}",
+				*BaNode.ParseSpecParameters(self, f"{specName}."),
+				self.__baseDir,
+				self.__grammarDir,
+				self.__grammarFile,
+			))
+		self.__iGraph = BehaviorIGraph()
+		self.waitForColdStartPermission()
+		if self.__intraProcess: RtBiInterfaces.subscribeToInProcessIGraph(self, self.__onDelta)
+		else: RtBiInterfaces.subscribeToIGraph(self, self.__onEvent)
+		RtBiInterfaces.subscribeToIsomorphism(self, self.__onIsomorphism)
+		RtBiInterfaces.subscribeToPredicates(self, self.__onPredicates)
+		return
+
+	def __onIsomorphism(self, msg: Msgs.RtBi.Isomorphism) -> None:
+		rawIsomorphism = loads(msg.isomorphism_json)
+		isomorphism: dict[NodeId, NodeId] = {}
+		for fromIdDictStr in rawIsomorphism:
+			isomorphism[NodeId.fromJson(fromIdDictStr)] = NodeId.fromJson(rawIsomorphism[fromIdDictStr])
+		for ba in self.__automata: ba.updateTokensWithIsomorphism(isomorphism)
+		return
+
+	def __onEvent(self, msg: Msgs.RtBi.IGraph) -> None:
+		return self.__onDelta(IGraphDelta.fromMsg(msg))
+
+	def __onDelta(self, delta: IGraphDelta) -> None:
+		if not self.__iGraph.applyDelta(delta): return
+		self.__iGraph.primeTruths(statement for ba in self.__automata for statement in ba.statements)
+		for ba in self.__automata:
+			if not ba.initializedTokens: ba.resetTokens(self.__iGraph)
+			else: ba.evaluate(self.__iGraph)
+		return
+
+	def __onPredicates(self, predicateJsonStr: str) -> None:
+		symMap = loads(predicateJsonStr)
+		for ba in self.__automata: ba.setSymbolicNameOfPredicate(symMap)
+		self.__iGraph.invalidateTruths()
+		return
+
+	def onColdStartAllowed(self, payload: ColdStartPayload) -> None:
+		predicates: dict[str, None] = {}
+		for ba in self.__automata:
+			if self.shouldRender: ba.initFlask(self)
+			predicates |= dict.fromkeys(ba.predicates)
+		self.publishColdStartDone({
+			"predicates": list(predicates),
+		})
+		return
+
+	def declareParameters(self) -> None:
+		self.log(f"{self.get_fully_qualified_name()} is setting node parameters.")
+		self.declare_parameter("grammar_dir", Parameter.Type.STRING)
+		self.declare_parameter("grammar_file", Parameter.Type.STRING)
+		self.declare_parameter("specs", Parameter.Type.STRING_ARRAY)
+		self.declare_parameter("intraProcess", False)
+		self.declare_parameter("engine", "propositional")
+		self.__specNames = list(self.get_parameter("specs").get_parameter_value().string_array_value)
+		for specName in self.__specNames: BaNode.DeclareSpecParameters(self, f"{specName}.")
+		return
+
+	def parseParameters(self) -> None:
+		self.log(f"{self.get_fully_qualified_name()} is parsing parameters.")
+		self.__grammarDir = self.get_parameter("grammar_dir").get_parameter_value().string_value
+		self.__grammarFile = self.get_parameter("grammar_file").get_parameter_value().string_value
+		self.__intraProcess = self.get_parameter("intraProcess").get_parameter_value().bool_value
+		engine = self.get_parameter("engine").get_parameter_value().string_value
+		assert engine in BaNode.ENGINES, f"Unknown BA engine {engine}, expected one of {list(BaNode.ENGINES)}."
+		self.__engine = BaNode.ENGINES[engine]
+		return
+
+	def render(self) -> None:
+		"""Each hosted automaton renders on its own timer, see :meth:`PropositionalBA.initFlask`."""
+		return
+
+def main(args=None) -> None:
+	return BaHostNode.Main(args)
+
+if __name__ == "__main__":
+	main()
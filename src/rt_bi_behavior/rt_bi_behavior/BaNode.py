@@ -1,4 +1,5 @@
 from json import loads
+from typing import Final, NamedTuple
 
 from ament_index_python.packages import get_package_share_directory
 from rclpy.parameter import Parameter
@@ -7,19 +8,30 @@ from rt_bi_behavior import package_name
 from rt_bi_behavior.Model.BehaviorIGraph import BehaviorIGraph
 # from rt_bi_behavior.Model.BehaviorAutomaton import BehaviorAutomaton
 from rt_bi_behavior.Model.PropositionalBA import PropositionalBA
+from rt_bi_behavior.Model.SymbolicBA import SymbolicBA
 from rt_bi_commons.Base.ColdStartableNode import ColdStartable, ColdStartPayload
 from rt_bi_commons.Base.RtBiNode import RtBiNode
+from rt_bi_commons.Shared.IGraphDelta import IGraphDelta
 from rt_bi_commons.Shared.NodeId import NodeId
 from rt_bi_commons.Utils import Ros
 from rt_bi_commons.Utils.Msgs import Msgs
 from rt_bi_commons.Utils.RtBiInterfaces import RtBiInterfaces
 
 
+class BaSpec(NamedTuple):
+	"""The parameters that define a single behavior automaton."""
+	states: list[str]
+	transitions: dict[str, dict[str, str]]
+	start: str
+	accepting: list[str]
+
 class BaNode(ColdStartable):
 	"""
 	This Node listens to all the messages published on the topics related to the Behavior Automaton.
 	This node combines topic listeners and service clients.
 	"""
+	ENGINES: Final[dict[str, type[PropositionalBA]]] = { "propositional": PropositionalBA, "symbolic": SymbolicBA }
+	"""The values of the `engine` parameter."""
 	def __init__(self, **kwArgs) -> None:
 		""" Create a Behavior Automaton node. """
 		newKw = { "node_name": "ba", "loggingSeverity": Ros.LoggingSeverity.WARN, **kwArgs}
@@ -30,23 +42,21 @@ class BaNode(ColdStartable):
 		self.__baseDir = get_package_share_directory(package_name)
 		self.__grammarDir: str = ""
 		self.__grammarFile: str = ""
-		self.__states: list[str] = []
-		self.__transitions: dict[str, dict[str, str]] = {}
-		self.__start: str = ""
-		self.__accepting: list[str] = []
+		self.__spec = BaSpec([], {}, "", [])
+		self.__intraProcess = False
+		self.__engine: type[PropositionalBA] = PropositionalBA
 		self.parseParameters()
-		self.__ba = PropositionalBA(
+		self.__ba = self.__engine(
 			self.__name,
-			self.__states,
-			self.__transitions,
-			self.__start,
-			self.__accepting,
+			*self.__spec,
 			self.__baseDir,
 			self.__grammarDir,
 			self.__grammarFile
 		)
+		self.__iGraph = BehaviorIGraph()
 		self.waitForColdStartPermission()
-		RtBiInterfaces.subscribeToIGraph(self, self.__onEvent)
+		if self.__intraProcess: RtBiInterfaces.subscribeToInProcessIGraph(self, self.__onDelta)
+		else: RtBiInterfaces.subscribeToIGraph(self, self.__onEvent)
 		RtBiInterfaces.subscribeToIsomorphism(self, self.__onIsomorphism)
 		RtBiInterfaces.subscribeToPredicates(self, self.__onPredicates)
 		return
@@ -63,14 +73,19 @@ class BaNode(ColdStartable):
 		return
 
 	def __onEvent(self, msg: Msgs.RtBi.IGraph) -> None:
-		iGraph = BehaviorIGraph.fromMsg(msg)
-		if not self.__ba.initializedTokens: self.__ba.resetTokens(iGraph)
-		else: self.__ba.evaluate(iGraph)
+		return self.__onDelta(IGraphDelta.fromMsg(msg))
+
+	def __onDelta(self, delta: IGraphDelta) -> None:
+		if not self.__iGraph.applyDelta(delta): return
+		self.__iGraph.primeTruths(self.__ba.statements)
+		if not self.__ba.initializedTokens: self.__ba.resetTokens(self.__iGraph)
+		else: self.__ba.evaluate(self.__iGraph)
 		return
 
 	def __onPredicates(self, predicateJsonStr: str) -> None:
 		symMap = loads(predicateJsonStr)
 		self.__ba.setSymbolicNameOfPredicate(symMap)
+		self.__iGraph.invalidateTruths()
 		return
 
 	def onColdStartAllowed(self, payload: ColdStartPayload) -> None:
@@ -84,32 +99,50 @@ class BaNode(ColdStartable):
 		self.log(f"{self.get_fully_qualified_name()} is setting node parameters.")
 		self.declare_parameter("grammar_dir", Parameter.Type.STRING)
 		self.declare_parameter("grammar_file", Parameter.Type.STRING)
-		self.declare_parameter("states", Parameter.Type.STRING_ARRAY)
-		self.declare_parameter("transitions_from", Parameter.Type.STRING_ARRAY)
-		self.declare_parameter("transitions_predicate", Parameter.Type.STRING_ARRAY)
-		self.declare_parameter("transitions_to", Parameter.Type.STRING_ARRAY)
-		self.declare_parameter("start", Parameter.Type.STRING)
-		self.declare_parameter("accepting", Parameter.Type.STRING_ARRAY)
+		BaNode.DeclareSpecParameters(self)
+		self.declare_parameter("intraProcess", False)
+		self.declare_parameter("engine", "propositional")
 		return
 
-	def parseParameters(self) -> None:
-		self.log(f"{self.get_fully_qualified_name()} is parsing parameters.")
-		self.__name = self.get_fully_qualified_name()
-		self.__grammarDir = self.get_parameter("grammar_dir").get_parameter_value().string_value
-		self.__grammarFile = self.get_parameter("grammar_file").get_parameter_value().string_value
-		self.__states = list(self.get_parameter("states").get_parameter_value().string_array_value)
-		frmList: list[str] = list(self.get_parameter("transitions_from").get_parameter_value().string_array_value)
-		prdList: list[str] = list(self.get_parameter("transitions_predicate").get_parameter_value().string_array_value)
-		toList: list[str] = list(self.get_parameter("transitions_to").get_parameter_value().string_array_value)
+	@staticmethod
+	def DeclareSpecParameters(node: Ros.Node, prefix: str = "") -> None:
+		"""Declares the parameters of a :class:`BaSpec`, each named `prefix` followed by the parameter name."""
+		node.declare_parameter(f"{prefix}states", Parameter.Type.STRING_ARRAY)
+		node.declare_parameter(f"{prefix}transitions_from", Parameter.Type.STRING_ARRAY)
+		node.declare_parameter(f"{prefix}transitions_predicate", Parameter.Type.STRING_ARRAY)
+		node.declare_parameter(f"{prefix}transitions_to", Parameter.Type.STRING_ARRAY)
+		node.declare_parameter(f"{prefix}start", Parameter.Type.STRING)
+		node.declare_parameter(f"{prefix}accepting", Parameter.Type.STRING_ARRAY)
+		return
+
+	@staticmethod
+	def ParseSpecParameters(node: Ros.Node, prefix: str = "") -> BaSpec:
+		states = list(node.get_parameter(f"{prefix}states").get_parameter_value().string_array_value)
+		frmList: list[str] = list(node.get_parameter(f"{prefix}transitions_from").get_parameter_value().string_array_value)
+		prdList: list[str] = list(node.get_parameter(f"{prefix}transitions_predicate").get_parameter_value().string_array_value)
+		toList: list[str] = list(node.get_parameter(f"{prefix}transitions_to").get_parameter_value().string_array_value)
+		transitions: dict[str, dict[str, str]] = {}
 		for i in range(len(frmList)):
 			frmState = frmList[i]
 			toState = toList[i]
 			prd = prdList[i]
-			if frmState not in self.__transitions: self.__transitions[frmState] = {}
-			self.__transitions[frmState][toState] = prd
+			if frmState not in transitions: transitions[frmState] = {}
+			transitions[frmState][toState] = prd
+
+		start = node.get_parameter(f"{prefix}start").get_parameter_value().string_value
+		accepting = list(node.get_parameter(f"{prefix}accepting").get_parameter_value().string_array_value)
+		return BaSpec(states, transitions, start, accepting)
 
-		self.__start = self.get_parameter("start").get_parameter_value().string_value
-		self.__accepting = list(self.get_parameter("accepting").get_parameter_value().string_array_value)
+	def parseParameters(self) -> None:
+		self.log(f"{self.get_fully_qualified_name()} is parsing parameters.")
+		self.__name = self.get_fully_qualified_name()
+		self.__grammarDir = self.get_parameter("grammar_dir").get_parameter_value().string_value
+		self.__grammarFile = self.get_parameter("grammar_file").get_parameter_value().string_value
+		self.__spec = BaNode.ParseSpecParameters(self)
+		self.__intraProcess = self.get_parameter("intraProcess").get_parameter_value().bool_value
+		engine = self.get_parameter("engine").get_parameter_value().string_value
+		assert engine in BaNode.ENGINES, f"Unknown BA engine {engine}, expected one of {list(BaNode.ENGINES)}."
+		self.__engine = BaNode.ENGINES[engine]
 		return
 
 	def render(self) -> None:
@@ -1,13 +1,12 @@
-from json import loads
-from typing import Any, cast
+from typing import Container, Iterable, cast
 
 import networkx as nx
 
 from rt_bi_behavior.Model.Transition import TransitionStatement
+from rt_bi_commons.Shared.IGraphDelta import IGraphDelta
 from rt_bi_commons.Shared.NodeId import NodeId
-from rt_bi_commons.Shared.Predicates import Predicates
+from rt_bi_commons.Shared.Predicates import PredicateSymbols
 from rt_bi_commons.Utils import Ros
-from rt_bi_commons.Utils.Msgs import Msgs
 from rt_bi_commons.Utils.NetworkX import NxUtils
 
 
@@ -15,6 +14,10 @@ class BehaviorIGraph(NxUtils.Graph):
 	def __init__(self, g: nx.DiGraph | None = None):
 		NxUtils.Graph.__init__(self, None)
 		nx.DiGraph.__init__(self, g)
+		self.__layers: dict[int, set[NodeId]] = {}
+		self.__seq = -1
+		self.__truths: dict[NodeId, dict[TransitionStatement, bool]] = {}
+		self.__csr: NxUtils.CsrView | None = None
 
 	def createNodeMarkers(self) -> list:
 		return []
@@ -23,10 +26,43 @@ class BehaviorIGraph(NxUtils.Graph):
 		return []
 
 	def satisfies(self, node: NodeId, criterion: TransitionStatement) -> bool:
-		predicates = self.getContent(node, "predicates")
-		return criterion.evaluate(predicates)
+		"""The outcomes are memoized per node, so the automata that share this graph evaluate each statement once per node."""
+		truths = self.__truths.setdefault(node, {})
+		if criterion not in truths: truths[criterion] = criterion.evaluate(self.getContent(node, "predicates"))
+		return truths[criterion]
 
-	def propagate(self, source: NodeId, visited: set[NodeId]) -> dict[NodeId, list[NodeId]]:
+	def primeTruths(self, criteria: Iterable[TransitionStatement]) -> None:
+		"""
+			Memoizes the outcomes of :meth:`satisfies` for all the nodes that miss any of them,
+			evaluating each criterion for all those nodes at once. Criteria without symbols are skipped.
+		"""
+		criteria = { criterion for criterion in criteria if criterion.hasSymbols }
+		nodes = [node for node in cast(Iterable[NodeId], self.nodes) if not criteria.issubset(self.__truths.get(node, {}).keys())]
+		if len(nodes) == 0: return
+		columns = PredicateSymbols.columns([self.getContent(node, "predicates").bitmask for node in nodes])
+		for criterion in criteria:
+			outcomes: list[bool] = criterion.evaluateColumns(columns).tolist()
+			for (node, outcome) in zip(nodes, outcomes): self.__truths.setdefault(node, {})[criterion] = outcome
+		return
+
+	@property
+	def csr(self) -> NxUtils.CsrView:
+		"""A CSR view of the successors, rebuilt on the first read after a delta is applied."""
+		if self.__csr is None: self.__csr = NxUtils.CsrView(self)
+		return self.__csr
+
+	def invalidateTruths(self) -> None:
+		"""Forgets the memoized outcomes of :meth:`satisfies`, e.g. when the symbols of the predicates change."""
+		self.__truths.clear()
+		return
+
+	def __removeLayer(self, hIndex: int) -> None:
+		nodes = self.__layers.pop(hIndex, set())
+		for node in nodes: self.__truths.pop(node, None)
+		self.remove_nodes_from(nodes)
+		return
+
+	def propagate(self, source: NodeId, visited: Container[NodeId]) -> dict[NodeId, list[NodeId]]:
 		"""Returns a dictionary from target Id to path"""
 		if source not in self.nodes: return {}
 		weightFn = lambda u, v, d: 1000000 if v in visited else 1
@@ -37,7 +73,7 @@ class BehaviorIGraph(NxUtils.Graph):
 		# Ros.Log("DIJKSTRA", [(d, destinations[d]) for d in destinations], severity=Ros.LoggingSeverity.ERROR)
 		return destinations
 
-	def propagateOneStep(self, source: NodeId, visited: set[NodeId]) -> dict[NodeId, list[NodeId]]:
+	def propagateOneStep(self, source: NodeId, visited: Container[NodeId]) -> dict[NodeId, list[NodeId]]:
 		if source not in self.nodes: return {}
 		paths: dict[NodeId, list[NodeId]] = {}
 		for destination in cast(list[NodeId], self[source]):
@@ -45,16 +81,29 @@ class BehaviorIGraph(NxUtils.Graph):
 			paths[destination] = [source, destination]
 		return paths
 
-	@classmethod
-	def fromMsg(cls, msg: Msgs.RtBi.IGraph) -> "BehaviorIGraph":
-		d: dict[str, Any] = loads(msg.adjacency_json)
-		for node in d["nodes"]:
-			node["id"] = NodeId.fromDict(node["id"])
-			node["predicates"] = Predicates(node["predicates"])
-		for adj in d["adjacency"]:
-			for edge in adj:
-				edge["id"] = NodeId.fromDict(edge["id"])
-		# Ros.Log("Graph Nodes", d["nodes"], severity=Ros.LoggingSeverity.ERROR)
-		# Ros.Log("Graph Adjacency", d["adjacency"], severity=Ros.LoggingSeverity.ERROR)
-		g = nx.adjacency_graph(d)
-		return BehaviorIGraph(g)
+	def applyDelta(self, delta: IGraphDelta) -> bool:
+		"""
+			Brings the mirrored top layers up to date with `delta`.
+			Returns `False` if the delta does not follow the last one applied,
+			in which case the mirror is left untouched until the next keyframe arrives.
+		"""
+		if delta.keyframe:
+			self.clear()
+			self.__layers.clear()
+			self.__truths.clear()
+		elif delta.seq != self.__seq + 1:
+			Ros.Log(f"I-graph delta {delta.seq} does not follow {self.__seq}. Waiting for a keyframe.", severity=Ros.LoggingSeverity.WARN)
+			return False
+		self.__csr = None
+		for hIndex in delta.removed: self.__removeLayer(hIndex)
+		for layer in delta.added:
+			self.__removeLayer(layer.hIndex)
+			nodes: set[NodeId] = set()
+			for (id_, predicates) in layer.nodes:
+				self.add_node(id_, **{ NxUtils.Graph.NODE_CONTENT: NxUtils.NodeData(predicates=predicates) })
+				nodes.add(id_)
+			self.__layers[layer.hIndex] = nodes
+			for (frm, to) in layer.edges:
+				if frm in self.nodes and to in self.nodes: self.add_edge(frm, to)
+		self.__seq = delta.seq
+		return True
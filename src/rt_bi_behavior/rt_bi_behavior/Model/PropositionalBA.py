@@ -1,20 +1,30 @@
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from json import dumps, loads
 from tempfile import TemporaryFile
-from typing import Final, TypeAlias, cast
+from threading import Lock
+from typing import Any, Final, NamedTuple, TypeAlias, cast
 
 import networkx as nx
 from networkx.drawing import nx_agraph
 
 from rt_bi_behavior.Model.BehaviorIGraph import BehaviorIGraph
-from rt_bi_behavior.Model.State import State, Token
+from rt_bi_behavior.Model.State import State, Token, TokenPath
 from rt_bi_behavior.Model.Transition import Transition, TransitionStatement
+from rt_bi_commons.Base.RtBiNode import RtBiNode
 from rt_bi_commons.Shared.NodeId import NodeId
 from rt_bi_commons.Shared.Predicates import Predicates
 from rt_bi_commons.Utils import Ros
 from rt_bi_commons.Utils.Msgs import Msgs
 
 
+class DotSnapshot(NamedTuple):
+	"""What is rendered of a BA, copied on the evaluation thread so the renderer never reads live state."""
+	states: tuple[tuple[str, tuple[tuple[str, Any], ...]], ...]
+	transitions: tuple[tuple[str, str, str], ...]
+	tokens: tuple[tuple[str, int, tuple[tuple[str, str], ...]], ...]
+	"""The number of tokens of each state, and the id and I-graph node of each, or a summary if there are too many."""
+
 class PropositionalBehaviorAutomaton(nx.DiGraph):
 	DOT_RENDER_MAX_TOKENS: Final[int] = 20
 	MAX_TOKENS_WARNING: Final[int] = 2000
@@ -30,6 +40,14 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 		):
 		super().__init__()
 		self.__dotPublisher: Ros.Publisher | None = None
+		self.__dotRenderer: ThreadPoolExecutor | None = None
+		self.__dotLock = Lock()
+		self.__dotRendering = False
+		"""Whether a render is in flight. Guarded by `__dotLock`."""
+		self.__dotPending: DotSnapshot | None = None
+		"""The latest snapshot taken while a render was in flight. Guarded by `__dotLock`."""
+		self.__dotLast: DotSnapshot | None = None
+		"""The latest snapshot that was published, a failed render is retried with the next one. Guarded by `__dotLock`."""
 		self.name = specName
 		assert start in states, f"Start state {start} is not in the set of states {states} in BA {self.name}."
 		for state in accepting: assert state in states, f"Accepting state {start} is not in the set of states {states} in BA {self.name}."
@@ -47,6 +65,10 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 	def initializedTokens(self) -> bool:
 		return self.__initializedTokens
 
+	@property
+	def accepting(self) -> list[str]:
+		return self.__accepting
+
 	@property
 	def predicates(self) -> list[str]:
 		d = {}
@@ -55,6 +77,10 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 			d |= statement.predicates
 		return list(d.keys())
 
+	@property
+	def statements(self) -> list[TransitionStatement]:
+		return [cast(TransitionStatement, statement) for (_, _, statement) in self.edges(data="statement")] # pyright: ignore[reportArgumentType]
+
 	@property
 	def states(self) -> dict[str, State]:
 		# This is the effective structure of the NodeView class here.
@@ -67,28 +93,10 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 	def __repr__(self):
 		return self.name
 
-	def __updateStateLabel(self, state: str) -> str:
-		Ros.Log(f"Updating label of {state}.")
-		cols: list[str] = []
-		if len(self.states[state]["tokens"]) > self.DOT_RENDER_MAX_TOKENS:
-			cols.append(f"<TD bgcolor='red'>{len(self.states[state]['tokens'])}</TD>")
-		else:
-			for token in self.states[state]["tokens"]:
-				cols.append(f"<TD bgcolor='orange'>{token['id']}</TD>")
-		colsStr = "".join(cols)
-		if len(colsStr) > 0:
-			colsStr = f"<TR>{colsStr}</TR>"
-		colSpan = 1 if len(cols) == 0 else len(cols)
-		label = f"<<TABLE border='0' cellborder='0' cellpadding='2'><TR><TD colspan='{colSpan}'>{state}</TD></TR>{colsStr}</TABLE>>" #CSpell: ignore -- cellborder
-		self.states[state]["label"] = label
-		if state in self.__accepting and len(self.states[state]["tokens"]) > 0:
-			self.states[state]["fillcolor"] = "DarkGreen"
-		return label
-
 	def __addState(self, name: str) -> None:
 		styles = ["rounded", "filled"]
 		peripheries = 2 if name in self.__accepting else 1
-		tokens = []
+		tokens: dict[NodeId, Token] = {}
 		self.add_node(
 			name,
 			label=name,
@@ -98,7 +106,6 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 			peripheries=peripheries,
 			fillcolor="WebGrey",
 		)
-		self.__updateStateLabel(name)
 		return
 
 	def __addTransition(self, source: str, syntax: str, destination: str) -> None:
@@ -117,61 +124,65 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 				self.__addTransition(src, statementSyntax, dst)
 		return
 
-	def __createToken(self, path: list[NodeId]) -> Token:
+	def _createToken(self, path: TokenPath) -> Token:
 		token = Token(id=f"{self.__tokenCounter}", path=path)
 		self.__tokenCounter += 1
 		return token
 
-	def __extendPath(self, path: list[NodeId], extension: list[NodeId]) -> list[NodeId]:
-		"""The `extension` must have as its first node, the last node in `path`."""
-		assert len(extension) >= 1
-		assert extension[0] == path[-1]
-		return path + extension[1:]
-
-	def __addToken(self, state: str, newToken: Token) -> None:
-		for token in self.states[state]["tokens"]:
-			if token["path"][-1] == newToken["path"][-1]:
-				return
-		self.states[state]["tokens"].append(newToken)
+	def _addToken(self, state: str, newToken: Token) -> None:
+		self.states[state]["tokens"].setdefault(newToken["path"].node, newToken)
 		return
 
-	def __propagateTokens(self, fromState: str, toState: str, iGraph: BehaviorIGraph) -> None:
+	def _canAccept(self, state: str, node: NodeId) -> bool:
+		"""Whether a token on `node` in `state` may still be accepted. Tokens that cannot are dropped instead of propagated. Here every token may."""
+		return True
+
+	def _propagateTokens(self, fromState: str, toState: str, iGraph: BehaviorIGraph) -> None:
+		"""
+		Extends the tokens of `fromState` depth first, over the CSR view of the I-graph.
+		A token that cannot be extended stays in `fromState`.
+		An extension that satisfies the transition moves to `toState`, otherwise it is extended further.
+		The first token to reach a node in a state is kept.
+		An extension is not created if one with the same footprint was already extended,
+		as everything it reaches was already reached first.
+		Tokens and extensions that cannot be accepted anymore are dropped, see :meth:`_canAccept`.
+		"""
 		statement = self[fromState][toState]["statement"]
-		tokens = self.states[fromState]["tokens"].copy()
-		self.states[fromState]["tokens"] = []
+		csr = iGraph.csr
+		tokens = [token for token in self.states[fromState]["tokens"].values() if self._canAccept(fromState, token["path"].node)]
+		self.states[fromState]["tokens"] = {}
+		arrived = self.states[toState]["tokens"]
+		explored: set[tuple[NodeId, frozenset[NodeId]]] = set()
 
 		while len(tokens) > 0:
 			token = tokens.pop()
-			visited: set[NodeId] = set()
-			for nId in token["path"]: visited.add(nId)
-			# BFS
-			# if fromState == "Q2": Ros.Log(f"===== Path {token['id']}", token['path'])
-			extensions = iGraph.propagateOneStep(token["path"][-1], visited)
-			if len(extensions) == 0: self.__addToken(fromState, token)
+			path = token["path"]
+			footprint = path.footprint()
+			# An extension with this footprint may have been pushed again before the first one was popped.
+			if footprint in explored: continue
+			explored.add(footprint)
+			extensions = [node for node in csr.successors(path.node) if node not in path]
+			if len(extensions) == 0: self._addToken(fromState, token)
 			for destination in extensions:
-				if destination in visited: continue
-				visited.add(destination)
-				path = self.__extendPath(token["path"], extensions[destination])
-				newToken = self.__createToken(path)
-				ps = iGraph.getContent(destination, "predicates")
-				# Ros.Log(f"Destination {destination}", [(p, ps[p]) for p in ps])
 				if iGraph.satisfies(destination, statement):
-					self.__addToken(toState, newToken)
+					if destination in arrived or not self._canAccept(toState, destination): continue
+					newToken = self._createToken(path.extend(destination))
+					arrived[destination] = newToken
 					if toState in self.__accepting:
 						Ros.Log(f"ACCEPTING {newToken['id']}", newToken["path"], severity=Ros.LoggingSeverity.ERROR)
 				else:
-					tokens.append(newToken)
+					if not self._canAccept(fromState, destination): continue
+					extension = path.extend(destination)
+					if extension.footprint() in explored: continue
+					tokens.append(self._createToken(extension))
 		return
 
 	def reduceUncertainty(self, state: str, iGraph: BehaviorIGraph) -> None:
 		if state in self.__accepting: return
 		tokens = self.states[state]["tokens"]
-		i = 0
-		while i < (len(tokens)):
-			if tokens[i]["path"][-1] not in iGraph.nodes: # Token has expired as the node is not in history anymore
-				tokens.pop(i)
-				i -= 1
-			i += 1
+		# A token expires when its node is not in history anymore
+		expired = [node for node in tokens if node not in iGraph.nodes]
+		for node in expired: del tokens[node]
 		return
 
 	def evaluate(self, iGraph: BehaviorIGraph) -> None:
@@ -195,8 +206,7 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 				if toState not in statesToUpdate: statesToUpdate.append(toState)
 				if len(self.states[fromState]["tokens"]) == 0: continue
 				Ros.Log(f"To State {toState}")
-				self.__propagateTokens(fromState, toState, iGraph)
-			self.__updateStateLabel(fromState)
+				self._propagateTokens(fromState, toState, iGraph)
 		Ros.Log(120 * f"┴")
 		return
 
@@ -216,7 +226,7 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 		return
 
 	def __removeAllTokens(self) -> None:
-		for n in self.states: self.states[n]["tokens"] = []
+		for n in self.states: self.states[n]["tokens"] = {}
 		return
 
 	def resetTokens(self, iGraph: BehaviorIGraph) -> None:
@@ -225,62 +235,112 @@ class PropositionalBehaviorAutomaton(nx.DiGraph):
 		self.__tokenCounter = 0
 		for nodeId in iGraph.nodes:
 			if cast(NodeId, nodeId).regionId.startswith("https://rezateshnizi.com/tower_bridge/defintion/av"): continue
-			token = self.__createToken([nodeId])
-			self.states[self.__start]["tokens"].append(token)
-		self.__updateStateLabel(self.__start)
+			token = self._createToken(TokenPath(nodeId))
+			self.states[self.__start]["tokens"][nodeId] = token
 		self.__initializedTokens = True
 		return
 
 	def updateTokensWithIsomorphism(self, isomorphism: dict[NodeId, NodeId]) -> None:
 		# Ros.Log("ISOMORPHISM", [(i, isomorphism[i]) for i in isomorphism], severity=Ros.LoggingSeverity.WARN)
-		for oldNode in isomorphism:
-			for state in self.states:
-				# Ros.Log(f"State {state} TOKENS", self.states[state]["tokens"], severity=Ros.LoggingSeverity.WARN)
-				for token in self.states[state]["tokens"]:
-					if token["path"][-1] == oldNode:
-						token["path"][-1] = isomorphism[oldNode]
+		for state in self.states:
+			# Ros.Log(f"State {state} TOKENS", self.states[state]["tokens"], severity=Ros.LoggingSeverity.WARN)
+			tokens = self.states[state]["tokens"]
+			moved = [tokens.pop(oldNode) for oldNode in isomorphism if oldNode in tokens]
+			for token in moved:
+				token["path"] = token["path"].replaceLast(isomorphism[token["path"].node])
+				tokens.setdefault(token["path"].node, token)
 		return
 
-	def initFlask(self, rosNode: Ros.Node) -> None:
+	def initFlask(self, rosNode: RtBiNode) -> None:
+		self.__dotRenderer = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}_dot")
 		(self.__dotPublisher, _) = Ros.CreatePublisher(
 			rosNode,
 			Msgs.Std.String,
 			"/rt_bi_behavior/dot_renderer",
 			callbackFunc=self.render,
 			intervalSecs=2,
+			# The snapshot reads the tokens, so it must not run alongside evaluation.
+			callbackGroup=rosNode.ingestGroup,
 		)
 		return
 
-	def __tokensReportForDot(self) -> dict[str, list[dict[str, str]]]:
-		d: dict[str, list[dict]] = {}
-		for state in self.states:
-			if len(self.states[state]["tokens"]) > self.DOT_RENDER_MAX_TOKENS:
-				d[state] = [{
-					"id": "===>",
-					"iGraphNode": f"Has {len(self.states[state]['tokens'])} tokens...",
-				}]
-			else:
-				d[state] = []
-				for t in self.states[state]["tokens"]:
-					d[state].append({
-						"id": t["id"],
-						"iGraphNode": repr(t["path"][-1]),
-					})
-		return d
-
-	def __prepareDot(self) -> str:
+	def __tokensReportForDot(self, state: str) -> tuple[tuple[str, str], ...]:
+		tokens = self.states[state]["tokens"]
+		if len(tokens) > self.DOT_RENDER_MAX_TOKENS:
+			return (("===>", f"Has {len(tokens)} tokens..."),)
+		return tuple((t["id"], repr(t["path"].node)) for t in tokens.values())
+
+	def __snapshotForDot(self) -> DotSnapshot:
+		states = tuple(
+			(state, tuple((k, v) for (k, v) in attrs.items() if k != "tokens"))
+			for (state, attrs) in self.nodes(data=True)
+		)
+		transitions = tuple((frm, to, label) for (frm, to, label) in self.edges(data="label")) # pyright: ignore[reportArgumentType]
+		tokens = tuple((state, len(self.states[state]["tokens"]), self.__tokensReportForDot(state)) for state in self.states)
+		return DotSnapshot(states, transitions, tokens)
+
+	def __stateLabel(self, state: str, count: int, report: tuple[tuple[str, str], ...]) -> str:
+		cols: list[str] = []
+		if count > self.DOT_RENDER_MAX_TOKENS:
+			cols.append(f"<TD bgcolor='red'>{count}</TD>")
+		else:
+			for (tokenId, _) in report:
+				cols.append(f"<TD bgcolor='orange'>{tokenId}</TD>")
+		colsStr = "".join(cols)
+		if len(colsStr) > 0:
+			colsStr = f"<TR>{colsStr}</TR>"
+		colSpan = 1 if len(cols) == 0 else len(cols)
+		return f"<<TABLE border='0' cellborder='0' cellpadding='2'><TR><TD colspan='{colSpan}'>{state}</TD></TR>{colsStr}</TABLE>>" #CSpell: ignore -- cellborder
+
+	def __prepareDot(self, snapshot: DotSnapshot) -> str:
+		"""Runs on the renderer thread. State labels are only built here, evaluation does not maintain them."""
+		graph = nx.DiGraph()
+		for (state, attrs) in snapshot.states: graph.add_node(state, **dict(attrs))
+		for (state, count, report) in snapshot.tokens:
+			graph.nodes[state]["label"] = self.__stateLabel(state, count, report)
+			if state in self.__accepting and count > 0: graph.nodes[state]["fillcolor"] = "DarkGreen"
+		for (frm, to, label) in snapshot.transitions: graph.add_edge(frm, to, label=label)
+		tokens = {
+			state: [{ "id": tokenId, "iGraphNode": node } for (tokenId, node) in report]
+			for (state, _, report) in snapshot.tokens
+		}
 		with TemporaryFile() as f:
-			aGraph = nx_agraph.to_agraph(self)
+			aGraph = nx_agraph.to_agraph(graph)
 			aGraph.draw(path=f, prog="dot", format="svg")
 			f.seek(0)
 			svg = f.read().decode()
-			return dumps({ "name": self.name, "svg": svg, "tokens": self.__tokensReportForDot() })
+			return dumps({ "name": self.name, "svg": svg, "tokens": tokens })
+
+	def __renderLoop(self, snapshot: DotSnapshot | None) -> None:
+		"""Runs on the renderer thread, until no newer snapshot was taken while rendering."""
+		while snapshot is not None:
+			assert self.__dotPublisher is not None
+			try:
+				self.__dotPublisher.publish(Msgs.Std.String(data=self.__prepareDot(snapshot)))
+				with self.__dotLock: self.__dotLast = snapshot
+			except Exception as e:
+				Ros.Log(f"Rendering {self.name} failed: {e}", severity=Ros.LoggingSeverity.ERROR)
+			with self.__dotLock:
+				(snapshot, self.__dotPending) = (self.__dotPending, None)
+				if snapshot == self.__dotLast: snapshot = None
+				if snapshot is None: self.__dotRendering = False
+		return
 
 	def render(self) -> None:
-		if self.__dotPublisher is None: return
-		dataStr = self.__prepareDot()
-		self.__dotPublisher.publish(Msgs.Std.String(data=dataStr))
-		# Ros.Log(f"Dot data sent for {self.name}.")
+		"""
+		Hands a snapshot of the BA to the renderer thread, if it changed since the last one.
+		Graphviz runs off the evaluation thread.
+		Snapshots taken while a render is in flight are coalesced, only the latest is rendered.
+		"""
+		if self.__dotPublisher is None or self.__dotRenderer is None: return
+		snapshot = self.__snapshotForDot()
+		with self.__dotLock:
+			if snapshot == self.__dotLast: return
+			if self.__dotRendering:
+				self.__dotPending = snapshot
+				return
+			self.__dotRendering = True
+		self.__dotRenderer.submit(self.__renderLoop, snapshot)
 		return
 
 PropositionalBA: TypeAlias = PropositionalBehaviorAutomaton
@@ -1,11 +1,63 @@
-from typing import TypedDict
+from dataclasses import dataclass
+from typing import Iterator, TypedDict
 
 from rt_bi_commons.Shared.NodeId import NodeId
 
 
+@dataclass(frozen=True, slots=True)
+class TokenPath:
+	"""
+	A persistent path of I-graph nodes, from the first node to `node`.
+	Extending a path shares it as the prefix of the new one, instead of copying it.
+	"""
+	node: NodeId
+	"""The last node of the path."""
+	parent: "TokenPath | None" = None
+	length: int = 1
+
+	def extend(self, node: NodeId) -> "TokenPath":
+		return TokenPath(node, self, self.length + 1)
+
+	def replaceLast(self, node: NodeId) -> "TokenPath":
+		return TokenPath(node, self.parent, self.length)
+
+	def __len__(self) -> int:
+		return self.length
+
+	def __iter__(self) -> Iterator[NodeId]:
+		nodes: list[NodeId] = []
+		path: TokenPath | None = self
+		while path is not None:
+			nodes.append(path.node)
+			path = path.parent
+		return reversed(nodes)
+
+	def footprint(self) -> tuple[NodeId, frozenset[NodeId]]:
+		"""
+			The last node, and the nodes of the path that :meth:`__contains__` searches for the nodes of its layer.
+			Two paths with the same footprint can be extended to the same nodes.
+		"""
+		nodes: set[NodeId] = set()
+		path: TokenPath | None = self
+		while path is not None and path.node.hIndex >= self.node.hIndex:
+			nodes.add(path.node)
+			path = path.parent
+		return (self.node, frozenset(nodes))
+
+	def __contains__(self, node: NodeId) -> bool:
+		"""
+			I-graph edges never decrease the `hIndex`, so only the suffix of the path
+			that is not older than `node` is searched.
+		"""
+		path: TokenPath | None = self
+		while path is not None and path.node.hIndex >= node.hIndex:
+			if path.node == node: return True
+			path = path.parent
+		return False
+
 class Token(TypedDict):
 	id: str
-	path: list[NodeId]
+	path: TokenPath
 
 class TokenWithoutHistory(TypedDict):
 	id: str
@@ -19,6 +71,7 @@ class StateWithoutHistory(TypedDict):
 
 class State(TypedDict):
 	label: str
-	tokens: list[Token]
+	tokens: dict[NodeId, Token]
+	"""Tokens keyed by the last node of their path, which is unique among the tokens of a state."""
 	style: str
 	fillcolor: str
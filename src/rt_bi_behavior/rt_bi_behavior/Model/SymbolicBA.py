@@ -0,0 +1,68 @@
+from typing import TypeAlias
+
+import numpy as np
+from scipy.sparse import csr_array
+
+from rt_bi_behavior.Model.BehaviorIGraph import BehaviorIGraph
+from rt_bi_behavior.Model.PropositionalBA import PropositionalBehaviorAutomaton
+from rt_bi_commons.Shared.NodeId import NodeId
+from rt_bi_commons.Utils.NetworkX import NxUtils
+
+
+class SymbolicBehaviorAutomaton(PropositionalBehaviorAutomaton):
+	"""
+	Moves tokens with the same traversal as :class:`PropositionalBehaviorAutomaton`,
+	so it accepts the same nodes with the same paths, but drops the tokens that can no longer be accepted.
+
+	Before each evaluation, the product of the BA and the I-graph is held as one node vector per state,
+	and the nodes from which each state can still reach an accepting state are found
+	with sparse matrix-vector products over the I-graph, ignoring the paths of the tokens.
+	The two newest layers count as reaching one, as the next layers connect to them.
+	Tokens and extensions outside of those vectors are neither created nor extended.
+	"""
+	def __init__(self, *args, **kwArgs) -> None:
+		super().__init__(*args, **kwArgs)
+		self.__csr: NxUtils.CsrView | None = None
+		self.__live: dict[str, np.ndarray] = {}
+		"""For each state, the rows of the CSR view on which a token may still be accepted."""
+		return
+
+	def __findLiveNodes(self, iGraph: BehaviorIGraph) -> None:
+		csr = iGraph.csr
+		n = len(csr.nodes)
+		adjacency = csr_array((np.ones(len(csr.indices), dtype=np.int32), csr.indices, csr.indPtr), shape=(n, n))
+		"""Row `u` lists the successors of `u`, and its product with a node vector marks their predecessors."""
+		hIndices = np.fromiter((node.hIndex for node in csr.nodes), dtype=np.int64, count=n)
+		# The newest layer gets edges into the next one, and the one before it into a newest layer that is replaced.
+		frontier = hIndices >= hIndices.max() - 1 if n > 0 else np.zeros(0, dtype=bool)
+		satisfied = {
+			(frm, to): np.fromiter((iGraph.satisfies(node, statement) for node in csr.nodes), dtype=bool, count=n)
+			for (frm, to, statement) in self.edges(data="statement") # pyright: ignore[reportArgumentType]
+		}
+		live = { state: np.ones(n, dtype=bool) if state in self.accepting else frontier.copy() for state in self.states }
+		changed = True
+		while changed:
+			changed = False
+			for state in self.states:
+				targets = live[state].copy()
+				for toState in self[state]: targets |= live[toState] & satisfied[(state, toState)]
+				grown = live[state] | ((adjacency @ targets.astype(np.int32)) > 0)
+				if np.array_equal(grown, live[state]): continue
+				live[state] = grown
+				changed = True
+		self.__live = live
+		self.__csr = csr
+		return
+
+	def _canAccept(self, state: str, node: NodeId) -> bool:
+		if self.__csr is None: return True
+		row = self.__csr.index.get(node, -1)
+		# Tokens on nodes that are not in the graph are left to the uncertainty reduction.
+		return row < 0 or bool(self.__live[state][row])
+
+	def evaluate(self, iGraph: BehaviorIGraph) -> None:
+		self.__findLiveNodes(iGraph)
+		super().evaluate(iGraph)
+		return
+
+SymbolicBA: TypeAlias = SymbolicBehaviorAutomaton
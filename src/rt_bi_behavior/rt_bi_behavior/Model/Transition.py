@@ -1,5 +1,7 @@
 from typing import Callable, Literal, TypedDict, cast
 
+import numpy as np
+
 from rt_bi_commons.Base.TransitionParser import ParseTree, TransitionInterpreter, TransitionParser, TransitionTransformer, UnexpectedToken, v_args
 from rt_bi_commons.Shared.Predicates import Predicates
 from rt_bi_commons.Utils import Ros
@@ -43,14 +45,13 @@ class PredicateCollector(TransitionInterpreter):
 		children: list[str] = self.visit_children(tree)
 		return children[0]
 
-class TransitionEvaluator(TransitionTransformer):
-	def __init__(self, predicateSymbolMap: dict[str, str], predicates: Predicates, simpleExpRebuildFn: Callable[[str, str, str], str]) -> None:
+class TransitionCompiler(TransitionTransformer):
+	"""Rewrites a transition statement as the source of a Python function of the `Predicates` of a node."""
+	def __init__(self, predicateSymbolMap: dict[str, str], simpleExpRebuildFn: Callable[[str, str, str], str]) -> None:
 		super().__init__()
 		self.__simpleExpRebuildFn = simpleExpRebuildFn
 		self.__symbolMap = predicateSymbolMap
 		"""Map from Transition Syntax to symbolic name."""
-		self.__predicates = predicates
-		"""Map from symbolic name to boolean value."""
 		return
 
 	def AND(self, _: str = "") -> Literal["and"]: return "and"
@@ -61,6 +62,9 @@ class TransitionEvaluator(TransitionTransformer):
 		fullStr = " ".join(children)
 		return fullStr
 
+	def negated_expression(self, children: list[str]) -> str:
+		return " ".join(children)
+
 	def connector(self, children: list[str]) -> str:
 		return children[0]
 
@@ -72,10 +76,11 @@ class TransitionEvaluator(TransitionTransformer):
 		transitionSyntax = self.__simpleExpRebuildFn(property_seq, test, value)
 		if transitionSyntax not in self.__symbolMap: raise KeyError(f"{transitionSyntax} does not have a symbol.")
 		sym = self.__symbolMap[transitionSyntax]
+		return self.lookup(sym)
+
+	def lookup(self, sym: str) -> str:
 		# Not having a predicate is logically interpreted as False
-		if sym not in self.__predicates: strVal = "False"
-		else: strVal = str(self.__predicates[sym])
-		return strVal
+		return f"p.get({sym!r}, False)"
 
 	def property_seq(self, children: list[str]) -> str:
 		children = super().property_seq(children)
@@ -87,15 +92,37 @@ class TransitionEvaluator(TransitionTransformer):
 	def value(self, children: list[str]) -> str:
 		return children[0]
 
+	def compile(self, parseTree: ParseTree) -> Callable[[Predicates], bool]:
+		body = self.transform(parseTree) # pyright: ignore[reportArgumentType]
+		return eval(f"lambda p: bool({body})")
+
+class VectorizedTransitionCompiler(TransitionCompiler):
+	"""
+		Rewrites a transition statement as the source of a Python function of the predicate columns of many nodes,
+		as given by :meth:`PredicateSymbols.columns`. Elementwise operators keep the precedence of their logical counterparts.
+	"""
+	def AND(self, _: str = "") -> Literal["&"]: return "&" # pyright: ignore[reportIncompatibleMethodOverride]
+	def OR(self, _: str = "") -> Literal["|"]: return "|" # pyright: ignore[reportIncompatibleMethodOverride]
+	def NOT(self, _: str = "") -> Literal["~"]: return "~" # pyright: ignore[reportIncompatibleMethodOverride]
+
+	def lookup(self, sym: str) -> str:
+		return f"c({sym!r})"
+
+	def compile(self, parseTree: ParseTree) -> Callable[[Callable[[str], np.ndarray]], np.ndarray]: # pyright: ignore[reportIncompatibleMethodOverride]
+		body = self.transform(parseTree) # pyright: ignore[reportArgumentType]
+		return eval(f"lambda c: {body}")
+
 class TransitionStatement:
 	def __init__(self, syntax: str, baseDir: str, grammarDir: str, grammarFileName: str) -> None:
 		self.__str: str = syntax
 		self.__symStr: str = syntax
-		self.__parseTree = TransitionParser(baseDir, grammarDir, grammarFileName).parse(syntax)
+		self.__parseTree = TransitionParser.Get(baseDir, grammarDir, grammarFileName).parse(syntax)
 		predCollector = PredicateCollector(self.__simpleExpRebuildFn)
 		predCollector.visit(self.__parseTree)
 		self.predicates: dict[str, str] = { p: "" for p in predCollector.predicates }
 		"""Map from Transition Syntax to symbolic name."""
+		self.__compiled: Callable[[Predicates], bool] | None = None
+		self.__vectorized: Callable[[Callable[[str], np.ndarray]], np.ndarray] | None = None
 		return
 
 	def __simpleExpRebuildFn(self, property_seq: str, test: str, value: str) -> str:
@@ -117,25 +144,30 @@ class TransitionStatement:
 		if syntax in self.predicates: return True
 		return False
 
+	@property
+	def hasSymbols(self) -> bool:
+		"""Whether every predicate in the statement has been assigned a symbol, so it can be evaluated."""
+		return all(symbol != "" for symbol in self.predicates.values())
+
 	def setPredicatesSymbol(self, syntax: str, symbol: str) -> None:
 		if syntax == "" or symbol == "": return
 		if syntax in self.predicates: self.predicates[syntax] = symbol
 		self.__symStr = self.__symStr.replace(syntax, symbol)
+		self.__compiled = None
+		self.__vectorized = None
 		return
 
 	def evaluate(self, predicates: Predicates) -> bool:
-		evaluator = TransitionEvaluator(
-			self.predicates,
-			predicates,
-			self.__simpleExpRebuildFn,
-		)
-		try:
-			valStr = evaluator.transform(self.__parseTree) # pyright: ignore[reportArgumentType]
-			val = eval(valStr)
-			if isinstance(val, bool): return val
-			else: raise ValueError(f"The evaluation result for {valStr} is not a boolean: {val}")
-		except Exception as e:
-			raise e
+		"""The statement is compiled on its first evaluation after the symbols are set."""
+		if self.__compiled is None:
+			self.__compiled = TransitionCompiler(self.predicates, self.__simpleExpRebuildFn).compile(self.__parseTree)
+		return self.__compiled(predicates)
+
+	def evaluateColumns(self, columns: Callable[[str], np.ndarray]) -> np.ndarray:
+		"""Evaluates the statement for many nodes at once, given their predicate columns from :meth:`PredicateSymbols.columns`."""
+		if self.__vectorized is None:
+			self.__vectorized = VectorizedTransitionCompiler(self.predicates, self.__simpleExpRebuildFn).compile(self.__parseTree)
+		return self.__vectorized(columns)
 
 class Transition(TypedDict):
 	label: str
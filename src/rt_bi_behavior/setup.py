@@ -19,6 +19,7 @@ setup(
 		"networkx~=3.2",
 		"setuptools==58.2.0",
 	],
+	tests_require=["pytest"],
 	zip_safe=True,
 	maintainer="Reza Teshnizi",
 	maintainer_email="reza.teshnizi@gmail.com",
@@ -27,6 +28,7 @@ setup(
 	entry_points={
 		"console_scripts": [
 			"BA = rt_bi_behavior.BaNode:main",
+			"BA_HOST = rt_bi_behavior.BaHostNode:main",
 			"BA_RENDERER = rt_bi_behavior.DotRenderer:main",
 		],
 	},
@@ -0,0 +1,74 @@
+import os
+import random
+
+import pytest
+
+from rt_bi_behavior.Model.BehaviorIGraph import BehaviorIGraph
+from rt_bi_behavior.Model.PropositionalBA import PropositionalBA
+from rt_bi_commons.Shared.IGraphDelta import IGraphDelta, LayerDelta
+from rt_bi_commons.Shared.NodeId import NodeId
+from rt_bi_commons.Shared.Predicates import Predicates
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..")
+SYMBOLS = { 'name == "a"': "p_a", 'name == "b"': "p_b", 'name == "c"': "p_c" }
+SPEC = (
+	["Q0", "Q1", "Q2", "Q3"],
+	{ "Q0": { "Q1": 'name == "a"' }, "Q1": { "Q2": 'name == "b"' }, "Q2": { "Q3": 'name == "c"' } },
+	"Q0",
+	["Q3"],
+	BASE_DIR,
+	"config",
+	"transition.lark",
+)
+REGIONS = 6
+LAYERS = 8
+
+class PerTokenBA(PropositionalBA):
+	"""The reference traversal, which extends one token at a time and never dedupes extensions."""
+	def _propagateTokens(self, fromState: str, toState: str, iGraph: BehaviorIGraph) -> None:
+		statement = self[fromState][toState]["statement"]
+		tokens = list(self.states[fromState]["tokens"].values())
+		self.states[fromState]["tokens"] = {}
+		while len(tokens) > 0:
+			token = tokens.pop()
+			extensions = iGraph.propagateOneStep(token["path"].node, token["path"])
+			if len(extensions) == 0: self._addToken(fromState, token)
+			for destination in extensions:
+				newToken = self._createToken(token["path"].extend(destination))
+				if iGraph.satisfies(destination, statement): self._addToken(toState, newToken)
+				else: tokens.append(newToken)
+		return
+
+def nodeId(hIndex: int, region: int) -> NodeId:
+	return NodeId(hIndex, hIndex, f"r{region}", "p", "")
+
+def randomLayer(rnd: random.Random, hIndex: int) -> LayerDelta:
+	nodes = tuple(
+		(nodeId(hIndex, r), Predicates({ sym: rnd.random() < 0.25 for sym in SYMBOLS.values() }))
+		for r in range(REGIONS)
+	)
+	edges: list[tuple[NodeId, NodeId]] = []
+	if hIndex > 0: edges += [(nodeId(hIndex - 1, r), nodeId(hIndex, r)) for r in range(REGIONS) if rnd.random() < 0.8]
+	for r in range(REGIONS):
+		for s in range(REGIONS):
+			if r != s and rnd.random() < 0.3: edges.append((nodeId(hIndex, r), nodeId(hIndex, s)))
+	return LayerDelta(hIndex, nodes, tuple(edges))
+
+def frontiers(ba: PropositionalBA) -> dict[str, dict[NodeId, list[NodeId]]]:
+	return { state: { node: list(token["path"]) for (node, token) in ba.states[state]["tokens"].items() } for state in ba.states }
+
+@pytest.mark.parametrize("seed", range(60))
+def test_propagation_matches_per_token_traversal(seed: int) -> None:
+	rnd = random.Random(seed)
+	automata = [PropositionalBA("batched", *SPEC), PerTokenBA("per_token", *SPEC)]
+	for ba in automata: ba.setSymbolicNameOfPredicate(SYMBOLS)
+	iGraph = BehaviorIGraph()
+	iGraph.applyDelta(IGraphDelta(0, True, (), (randomLayer(rnd, 0),)))
+	for ba in automata: ba.resetTokens(iGraph)
+	for hIndex in range(1, LAYERS):
+		removed = (hIndex - 2,) if hIndex >= 2 else ()
+		assert iGraph.applyDelta(IGraphDelta(hIndex, False, removed, (randomLayer(rnd, hIndex),)))
+		for ba in automata: ba.evaluate(iGraph)
+		(actual, expected) = [frontiers(ba) for ba in automata]
+		assert actual == expected, f"Frontiers differ after layer {hIndex}."
+	return
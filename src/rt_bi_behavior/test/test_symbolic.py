@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from rt_bi_behavior.Model.BehaviorIGraph import BehaviorIGraph
+from rt_bi_behavior.Model.PropositionalBA import PropositionalBA
+from rt_bi_behavior.Model.SymbolicBA import SymbolicBA
+from rt_bi_commons.Shared.IGraphDelta import IGraphDelta
+from rt_bi_commons.Shared.NodeId import NodeId
+from test_propagation import SPEC, SYMBOLS, randomLayer
+
+LAYERS = 12
+HISTORY = 5
+
+def accepted(ba: PropositionalBA) -> dict[NodeId, list[NodeId]]:
+	return { node: list(token["path"]) for (node, token) in ba.states["Q3"]["tokens"].items() }
+
+@pytest.mark.parametrize("seed", range(100))
+def test_symbolic_accepts_like_propositional(seed: int) -> None:
+	rnd = random.Random(seed)
+	automata = [SymbolicBA("symbolic", *SPEC), PropositionalBA("propositional", *SPEC)]
+	for ba in automata: ba.setSymbolicNameOfPredicate(SYMBOLS)
+	iGraph = BehaviorIGraph()
+	iGraph.applyDelta(IGraphDelta(0, True, (), (randomLayer(rnd, 0),)))
+	for ba in automata: ba.resetTokens(iGraph)
+	for hIndex in range(1, LAYERS):
+		removed = (hIndex - HISTORY,) if hIndex >= HISTORY else ()
+		assert iGraph.applyDelta(IGraphDelta(hIndex, False, removed, (randomLayer(rnd, hIndex),)))
+		for ba in automata: ba.evaluate(iGraph)
+		(actual, expected) = [accepted(ba) for ba in automata]
+		assert actual == expected, f"Accepted nodes differ after layer {hIndex}."
+		(symbolic, propositional) = [{ node for state in ba.states for node in ba.states[state]["tokens"] } for ba in automata]
+		assert symbolic <= propositional
+	return
@@ -0,0 +1,39 @@
+from rt_bi_behavior.Model.State import TokenPath
+from rt_bi_commons.Shared.NodeId import NodeId
+
+
+def nodeId(hIndex: int, region: int) -> NodeId:
+	return NodeId(hIndex, hIndex, f"r{region}", "p", "")
+
+def test_extending_shares_the_prefix() -> None:
+	prefix = TokenPath(nodeId(0, 0)).extend(nodeId(0, 1))
+	(left, right) = (prefix.extend(nodeId(1, 1)), prefix.extend(nodeId(1, 2)))
+	assert left.parent is prefix and right.parent is prefix
+	assert list(left) == [nodeId(0, 0), nodeId(0, 1), nodeId(1, 1)]
+	assert list(right) == [nodeId(0, 0), nodeId(0, 1), nodeId(1, 2)]
+	assert (len(prefix), len(left)) == (2, 3)
+	return
+
+def test_contains() -> None:
+	path = TokenPath(nodeId(0, 0)).extend(nodeId(0, 1)).extend(nodeId(1, 1)).extend(nodeId(1, 2))
+	for id_ in path: assert id_ in path
+	assert nodeId(1, 0) not in path
+	assert nodeId(2, 1) not in path
+	return
+
+def test_replace_last() -> None:
+	path = TokenPath(nodeId(0, 0)).extend(nodeId(1, 0))
+	replaced = path.replaceLast(nodeId(1, 5))
+	assert list(replaced) == [nodeId(0, 0), nodeId(1, 5)]
+	assert list(path) == [nodeId(0, 0), nodeId(1, 0)]
+	assert len(replaced) == len(path)
+	return
+
+def test_footprint_is_the_last_node_and_its_layer() -> None:
+	(a, b, c) = (nodeId(1, 0), nodeId(1, 1), nodeId(1, 2))
+	first = TokenPath(nodeId(0, 0)).extend(a).extend(b).extend(c)
+	second = TokenPath(nodeId(0, 3)).extend(b).extend(a).extend(c)
+	assert first.footprint() == second.footprint() == (c, frozenset({ a, b, c }))
+	assert first.footprint() != TokenPath(nodeId(0, 0)).extend(b).extend(c).footprint()
+	assert first.extend(nodeId(2, 0)).footprint() == (nodeId(2, 0), frozenset({ nodeId(2, 0) }))
+	return
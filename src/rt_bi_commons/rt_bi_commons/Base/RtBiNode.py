@@ -5,6 +5,8 @@ from pathlib import Path
 from typing import TypeVar, final
 
 import rclpy
+from rclpy.callback_groups import CallbackGroup, MutuallyExclusiveCallbackGroup, ReentrantCallbackGroup
+from rclpy.executors import Executor, MultiThreadedExecutor, SingleThreadedExecutor
 from rclpy.logging import LoggingSeverity
 from rclpy.node import Node
 
@@ -20,6 +22,19 @@ class RtBiNode(Node, ABC):
 		self.shouldRender: bool = self.get_parameter("render").get_parameter_value().bool_value
 		self.declare_parameter("profile", False)
 		self.isProfiling: bool = self.get_parameter("profile").get_parameter_value().bool_value
+		self.declare_parameter("executorThreads", 1)
+		self.executorThreads: int = max(1, self.get_parameter("executorThreads").get_parameter_value().integer_value)
+		"""With more than one thread, callbacks of different groups run concurrently."""
+		self.ingestGroup: CallbackGroup = MutuallyExclusiveCallbackGroup()
+		"""Subscriptions to incoming data."""
+		self.processingGroup: CallbackGroup = MutuallyExclusiveCallbackGroup()
+		"""Timers that process or publish data."""
+		self.renderGroup: CallbackGroup = MutuallyExclusiveCallbackGroup()
+		"""Timers that render for visualization."""
+		self.serviceGroup: CallbackGroup = MutuallyExclusiveCallbackGroup()
+		"""Services."""
+		self.clientGroup: CallbackGroup = ReentrantCallbackGroup()
+		"""The responses of clients. It is reentrant, so a response is handled while a callback of any group waits for it."""
 		Ros.SetLogger(self, self.get_logger(), self.__defaultLoggingSeverity, self.isProfiling)
 		self.log("%s is initializing." % self.get_fully_qualified_name())
 
@@ -55,15 +70,28 @@ class RtBiNode(Node, ABC):
 				nodeName = self.get_fully_qualified_name().replace("/", "X")
 				outputFile = f"/home/reza/git/behavior-inference/log-rtbi/profiler/{date}/{nodeName}.prof"
 				Path(outputFile).parent.mkdir(parents=True, exist_ok=True)
-				cProfile.runctx("rclpy.spin(self)",globals(), locals(), outputFile)
+				spin = self.__spin
+				cProfile.runctx("spin()",globals(), locals(), outputFile)
 			else:
-				rclpy.spin(self)
+				self.__spin()
 		except KeyboardInterrupt as e:
 			pass
 		except Exception as e:
 			raise e
 		return
 
+	def __spin(self) -> None:
+		if self.executorThreads == 1: return rclpy.spin(self)
+		executor = RtBiNode.CreateExecutor(self.executorThreads)
+		executor.add_node(self)
+		executor.spin()
+		return
+
+	@staticmethod
+	def CreateExecutor(threads: int) -> Executor:
+		if threads > 1: return MultiThreadedExecutor(num_threads=threads)
+		return SingleThreadedExecutor()
+
 	@final
 	def destroy_node(self) -> None:
 		Ros.LogMessageStats()
@@ -1,6 +1,6 @@
 from abc import ABC
 from pathlib import Path
-from typing import Any, Literal, TypeVar
+from typing import Any, ClassVar, Literal, TypeVar
 
 from lark.exceptions import UnexpectedToken
 from lark.lark import Lark
@@ -54,7 +54,19 @@ class TransitionTransformer(__TransitionVisitorBase, Transformer[str, Any], ABC)
 		return super().property_seq(variables)
 
 class TransitionParser(Lark):
+	__parsers: ClassVar[dict[Path, "TransitionParser"]] = {}
+
 	def __init__(self, baseDir: str, transitionGrammarDir: str, grammarFileName: str) -> None:
+		"""Prefer :meth:`Get`. Lark keeps the analysed grammar in a cache file that is shared across processes."""
 		grammarFilePath = Path(baseDir, transitionGrammarDir, grammarFileName)
 		grammar = grammarFilePath.read_text()
-		super().__init__(grammar, parser="lalr", transformer=Transformer()) # CSpell: ignore - lalr
+		super().__init__(grammar, parser="lalr", transformer=Transformer(), cache=True) # CSpell: ignore - lalr
+		return
+
+	@classmethod
+	def Get(cls, baseDir: str, transitionGrammarDir: str, grammarFileName: str) -> "TransitionParser":
+		"""The parser of the grammar file, built once per process."""
+		grammarFilePath = Path(baseDir, transitionGrammarDir, grammarFileName).resolve()
+		if grammarFilePath not in cls.__parsers:
+			cls.__parsers[grammarFilePath] = TransitionParser(baseDir, transitionGrammarDir, grammarFileName)
+		return cls.__parsers[grammarFilePath]
@@ -92,7 +92,7 @@ class ListReferenceParser(
 			self.__conversionTimer = None
 		if intermediateVal is None:
 			boundFunc = partial(self.convertToValue, intermediateVal, srcInd)
-			self.__conversionTimer = Ros.CreateTimer(self.node, boundFunc, 2000)
+			self.__conversionTimer = Ros.CreateTimer(self.node, boundFunc, 2000, self.node.processingGroup)
 			return cast(_V, None)
 		return cast(_V, intermediateVal)
 
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+
+from rt_bi_commons.Shared.NodeId import NodeId
+from rt_bi_commons.Shared.Predicates import Predicates
+from rt_bi_commons.Utils.Msgs import Msgs
+
+
+@dataclass(frozen=True)
+class LayerDelta:
+	"""The nodes of an I-graph layer, with their predicates, and the edges that end in them."""
+	hIndex: int
+	nodes: tuple[tuple[NodeId, Predicates], ...]
+	edges: tuple[tuple[NodeId, NodeId], ...]
+
+@dataclass(frozen=True)
+class IGraphDelta:
+	"""
+	An update to the top layers of the I-graph, as they are mirrored by the BA.
+	Applying the deltas in the order of their `seq` reproduces the top layers of the I-graph.
+	A keyframe carries all the top layers and replaces whatever the receiver holds.
+	"""
+	seq: int
+	keyframe: bool
+	removed: tuple[int, ...]
+	"""The `hIndex` of the layers to drop. These are dropped before `added` is applied."""
+	added: tuple[LayerDelta, ...]
+
+	def toMsg(self) -> Msgs.RtBi.IGraph:
+		strings: dict[str, int] = {}
+		predicates: dict[str, int] = {}
+		handles: dict[NodeId, int] = {}
+		msg = Msgs.RtBi.IGraph()
+		msg.seq = self.seq
+		msg.keyframe = self.keyframe
+		msg.removed_layers = list(self.removed)
+		intern = lambda s: strings.setdefault(s, len(strings))
+		for layer in self.added:
+			for (id_, preds) in layer.nodes:
+				handles.setdefault(id_, len(handles))
+				for p in preds: predicates.setdefault(p, len(predicates))
+		addedCount = len(handles)
+		stride = (len(predicates) + 7) // 8
+		bitsets = bytearray(stride * addedCount)
+		knownBitsets = bytearray(stride * addedCount)
+		layerPtr = [0]
+		edgePtr = [0]
+		edgeSrc: list[int] = []
+		for layer in self.added:
+			sources: dict[NodeId, list[NodeId]] = {}
+			for (frm, to) in layer.edges: sources.setdefault(to, []).append(frm)
+			for (id_, preds) in layer.nodes:
+				bits = 0
+				known = 0
+				for p in preds:
+					known |= 1 << predicates[p]
+					if preds[p] is True or preds[p] == Msgs.RtBi.Predicate.TRUE: bits |= 1 << predicates[p]
+				i = handles[id_]
+				bitsets[i * stride : (i + 1) * stride] = bits.to_bytes(stride, "little")
+				knownBitsets[i * stride : (i + 1) * stride] = known.to_bytes(stride, "little")
+				for frm in sources.get(id_, []): edgeSrc.append(handles.setdefault(frm, len(handles)))
+				edgePtr.append(len(edgeSrc))
+			layerPtr.append(layerPtr[-1] + len(layer.nodes))
+		msg.layer_h_index = [layer.hIndex for layer in self.added]
+		msg.layer_node_ptr = layerPtr
+		msg.added_count = addedCount
+		msg.node_h_index = [id_.hIndex for id_ in handles]
+		msg.node_time = [id_.timeNanoSecs for id_ in handles]
+		msg.node_region = [intern(id_.regionId) for id_ in handles]
+		msg.node_polygon = [intern(id_.polygonId) for id_ in handles]
+		msg.node_sub_part = [intern(id_.subPartId) for id_ in handles]
+		msg.node_predicates = bytes(bitsets)
+		msg.node_known_predicates = bytes(knownBitsets)
+		msg.edge_ptr = edgePtr
+		msg.edge_src = edgeSrc
+		msg.strings = list(strings)
+		msg.predicates = list(predicates)
+		return msg
+
+	@staticmethod
+	def fromMsg(msg: Msgs.RtBi.IGraph) -> "IGraphDelta":
+		strings = list(msg.strings)
+		names = list(msg.predicates)
+		stride = (len(names) + 7) // 8
+		bitsets = bytes(msg.node_predicates)
+		knownBitsets = bytes(msg.node_known_predicates)
+		ids = [
+			NodeId(hIndex=h, timeNanoSecs=t, regionId=strings[r], polygonId=strings[p], subPartId=strings[s])
+			for (h, t, r, p, s) in zip(msg.node_h_index, msg.node_time, msg.node_region, msg.node_polygon, msg.node_sub_part)
+		]
+		edgePtr = list(msg.edge_ptr)
+		edgeSrc = list(msg.edge_src)
+		layerPtr = list(msg.layer_node_ptr)
+		added: list[LayerDelta] = []
+		for (layer, hIndex) in enumerate(msg.layer_h_index):
+			nodes: list[tuple[NodeId, Predicates]] = []
+			edges: list[tuple[NodeId, NodeId]] = []
+			for i in range(layerPtr[layer], layerPtr[layer + 1]):
+				bits = int.from_bytes(bitsets[i * stride : (i + 1) * stride], "little")
+				known = int.from_bytes(knownBitsets[i * stride : (i + 1) * stride], "little")
+				preds: dict[str, bool] = {}
+				# Only the predicates the node carries, lowest bit first.
+				while known:
+					j = (known & -known).bit_length() - 1
+					preds[names[j]] = bool(bits >> j & 1)
+					known &= known - 1
+				nodes.append((ids[i], Predicates(preds)))
+				for src in edgeSrc[edgePtr[i] : edgePtr[i + 1]]: edges.append((ids[src], ids[i]))
+			added.append(LayerDelta(hIndex=hIndex, nodes=tuple(nodes), edges=tuple(edges)))
+		return IGraphDelta(seq=msg.seq, keyframe=msg.keyframe, removed=tuple(msg.removed_layers), added=tuple(added))
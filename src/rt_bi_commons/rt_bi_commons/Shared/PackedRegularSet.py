@@ -0,0 +1,135 @@
+from array import array
+from dataclasses import dataclass
+
+import numpy as np
+
+from rt_bi_commons.Shared.Pose import Coords
+from rt_bi_commons.Shared.Predicates import Predicates
+from rt_bi_commons.Utils import Ros
+from rt_bi_commons.Utils.Msgs import Msgs
+
+
+@dataclass(slots=True)
+class PackedPolygon:
+	id: str
+	coords: np.ndarray
+	"""The `(n, 2)` vertices, a view into the message."""
+	centerOfRotation: Coords
+
+@dataclass(slots=True)
+class PackedTracklet:
+	id: str
+	x: float
+	y: float
+	angleFromX: float
+	entered: bool
+	exited: bool
+
+@dataclass(slots=True)
+class PackedRegularSet:
+	"""
+	A set decoded from a :class:`Msgs.RtBi.PackedRegularSetArray`.
+	The attributes are named after those of :class:`Msgs.RtBi.RegularSet`, so both can be queued alike,
+	but the values are decoded: `stamp` is in nanoseconds, `predicates` is a :class:`Predicates`,
+	and polygons and tracklets are plain objects.
+	"""
+	id: str
+	set_type: str
+	channel: str
+	stamp: int
+	predicates: Predicates
+	estimations: list[PackedTracklet]
+	polygons: list[PackedPolygon]
+
+	@staticmethod
+	def __view(field: array | bytes | list, dtype: type) -> np.ndarray:
+		"""A view of a message array field, fields of a message that was not serialized are copied."""
+		if isinstance(field, (array, bytes)): return np.frombuffer(field, dtype=dtype)
+		return np.asarray(field, dtype=dtype)
+
+	@staticmethod
+	def toMsg(sets: list[Msgs.RtBi.RegularSet]) -> Msgs.RtBi.PackedRegularSetArray:
+		"""Packs regular sets, their time intervals are dropped."""
+		strings: dict[str, int] = {}
+		intern = lambda s: strings.setdefault(s, len(strings))
+		msg = Msgs.RtBi.PackedRegularSetArray()
+		predicatePtr = [0]
+		predicateNames: list[int] = []
+		predicateBits = 0
+		polygonPtr = [0]
+		polygonIds: list[int] = []
+		centers: list[float] = []
+		vertexPtr = [0]
+		coords: list[float] = []
+		trackletPtr = [0]
+		trackletIds: list[int] = []
+		poses: list[float] = []
+		flags: list[int] = []
+		for regularSet in sets:
+			if len(regularSet.intervals) > 0: Ros.Log(f"Time intervals of {regularSet.id} are not packed.")
+			for predicate in regularSet.predicates:
+				if predicate.value == Msgs.RtBi.Predicate.TRUE: predicateBits |= 1 << len(predicateNames)
+				predicateNames.append(intern(predicate.name))
+			predicatePtr.append(len(predicateNames))
+			for polyMsg in regularSet.polygons:
+				polygonIds.append(intern(polyMsg.id))
+				centers += [polyMsg.center_of_rotation.x, polyMsg.center_of_rotation.y]
+				for p in polyMsg.region.points: coords += [p.x, p.y]
+				vertexPtr.append(len(coords) // 2)
+			polygonPtr.append(len(polygonIds))
+			for tracklet in regularSet.estimations:
+				trackletIds.append(intern(tracklet.id))
+				poses += [tracklet.pose.position.x, tracklet.pose.position.y, Msgs.toAngle(tracklet.pose.orientation)]
+				flags.append(int(tracklet.entered) | int(tracklet.exited) << 1)
+			trackletPtr.append(len(trackletIds))
+		msg.set_types = "".join(regularSet.set_type for regularSet in sets)
+		msg.set_id = [intern(regularSet.id) for regularSet in sets]
+		msg.set_channel = [intern(regularSet.channel) for regularSet in sets]
+		msg.set_stamp = [Msgs.toNanoSecs(regularSet.stamp) for regularSet in sets]
+		msg.predicate_ptr = predicatePtr
+		msg.predicate_name = predicateNames
+		msg.predicate_values = predicateBits.to_bytes((len(predicateNames) + 7) // 8, "little")
+		msg.polygon_ptr = polygonPtr
+		msg.polygon_id = polygonIds
+		msg.polygon_center = centers
+		msg.vertex_ptr = vertexPtr
+		msg.coords = coords
+		msg.tracklet_ptr = trackletPtr
+		msg.tracklet_id = trackletIds
+		msg.tracklet_pose = poses
+		msg.tracklet_flags = flags
+		msg.strings = list(strings)
+		return msg
+
+	@staticmethod
+	def fromMsg(msg: Msgs.RtBi.PackedRegularSetArray) -> list["PackedRegularSet"]:
+		"""Decodes the sets, the vertices of the polygons are views into the coordinates of the message."""
+		strings = list(msg.strings)
+		predicatePtr = list(msg.predicate_ptr)
+		predicateNames = [strings[i] for i in msg.predicate_name]
+		predicateBits = int.from_bytes(bytes(msg.predicate_values), "little")
+		polygonPtr = list(msg.polygon_ptr)
+		polygonIds = [strings[i] for i in msg.polygon_id]
+		centers = PackedRegularSet.__view(msg.polygon_center, np.float32).reshape(-1, 2).tolist()
+		vertexPtr = list(msg.vertex_ptr)
+		coords = PackedRegularSet.__view(msg.coords, np.float32).reshape(-1, 2)
+		trackletPtr = list(msg.tracklet_ptr)
+		trackletIds = [strings[i] for i in msg.tracklet_id]
+		poses = PackedRegularSet.__view(msg.tracklet_pose, np.float32).reshape(-1, 3).tolist()
+		flags = bytes(msg.tracklet_flags)
+		sets: list[PackedRegularSet] = []
+		for (i, (setType, setId, channel, stamp)) in enumerate(zip(msg.set_types, msg.set_id, msg.set_channel, msg.set_stamp)):
+			predicates = Predicates({
+				predicateNames[j]: bool(predicateBits >> j & 1)
+				for j in range(predicatePtr[i], predicatePtr[i + 1])
+			})
+			polygons = [
+				PackedPolygon(polygonIds[j], coords[vertexPtr[j] : vertexPtr[j + 1]], (centers[j][0], centers[j][1]))
+				for j in range(polygonPtr[i], polygonPtr[i + 1])
+			]
+			tracklets = [
+				PackedTracklet(trackletIds[j], poses[j][0], poses[j][1], poses[j][2], bool(flags[j] & 1), bool(flags[j] & 2))
+				for j in range(trackletPtr[i], trackletPtr[i + 1])
+			]
+			sets.append(PackedRegularSet(strings[setId], setType, strings[channel], int(stamp), predicates, tracklets, polygons))
+		return sets
@@ -1,34 +1,121 @@
+from typing import Callable, ClassVar
+
+import numpy as np
 from typing_extensions import Self
 
 from rt_bi_commons.Utils.Msgs import Msgs
 
 
+class PredicateSymbols:
+	"""A process-wide table that interns every predicate name as the index of a bit."""
+	__bits: ClassVar[dict[str, int]] = {}
+
+	@classmethod
+	def bit(cls, p: str) -> int:
+		return cls.__bits.setdefault(p, len(cls.__bits))
+
+	@classmethod
+	def columns(cls, masks: list[int]) -> Callable[[str], np.ndarray]:
+		"""
+			Given the :attr:`Predicates.bitmask` of `n` nodes,
+			returns a function from a predicate name to the `bool` column of its values for those nodes.
+		"""
+		wide = len(cls.__bits) > 64
+		arr = np.array(masks, dtype=object if wide else np.uint64)
+		def column(p: str) -> np.ndarray:
+			bit = cls.bit(p)
+			if wide: return ((arr >> bit) & 1).astype(bool)
+			# None of the masks can have a bit that was interned after they were made.
+			if bit >= 64: return np.zeros(len(masks), dtype=bool)
+			return ((arr >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+		return column
+
 class Predicates(dict[str, bool]):
+	"""
+	Values are always `bool`, values of messages are converted on construction and assignment.
+	The values are also kept as bits, which every change to the predicates maintains.
+	"""
+	__bitmask: int = 0
+	__known: int = 0
+	"""The bits of all the predicates, whether true or false."""
+
+	def __init__(self, *args, **kwArgs) -> None:
+		super().__init__(*args, **kwArgs)
+		if len(args) == 1 and len(kwArgs) == 0 and isinstance(args[0], Predicates):
+			(self.__bitmask, self.__known) = (args[0].__bitmask, args[0].__known)
+			return
+		for (p, val) in self.items():
+			val = Predicates.__asBool(p, val)
+			super().__setitem__(p, val)
+			self.__setBit(p, val)
+		return
+
+	def __setBit(self, p: str, val: bool | None) -> None:
+		"""Sets the bit of `p` to `val`, or forgets it if `val` is `None`."""
+		bit = 1 << PredicateSymbols.bit(p)
+		self.__known = self.__known & ~bit if val is None else self.__known | bit
+		self.__bitmask = self.__bitmask | bit if val else self.__bitmask & ~bit
+		return
+
 	def __setitem__(self, p: str, val: str | bool) -> None:
+		val = Predicates.__asBool(p, val)
+		super().__setitem__(p, val)
+		self.__setBit(p, val)
+		return
+
+	def __delitem__(self, p: str) -> None:
+		super().__delitem__(p)
+		self.__setBit(p, None)
+		return
+
+	def pop(self, p: str, *default: bool) -> bool:
+		if p in self: self.__setBit(p, None)
+		return super().pop(p, *default)
+
+	def popitem(self) -> tuple[str, bool]:
+		(p, val) = super().popitem()
+		self.__setBit(p, None)
+		return (p, val)
+
+	def setdefault(self, p: str, val: bool = False) -> bool:
+		if p not in self: self[p] = val
+		return self[p]
+
+	def clear(self) -> None:
+		super().clear()
+		(self.__bitmask, self.__known) = (0, 0)
+		return
+
+	@staticmethod
+	def __asBool(p: str, val: str | bool) -> bool:
 		assert (
 			isinstance(val, bool) or
 			val == Msgs.RtBi.Predicate.FALSE or
 			val == Msgs.RtBi.Predicate.TRUE
 		), f"Unexpected value for predicate {p}: {val}"
-		if isinstance(val, bool):
-			super().__setitem__(p, val)
-			return
-		if val == Msgs.RtBi.Predicate.TRUE:
-			super().__setitem__(p, True)
-			return
-		if val == Msgs.RtBi.Predicate.FALSE:
-			super().__setitem__(p, False)
-			return
-		return
+		if isinstance(val, bool): return val
+		return val == Msgs.RtBi.Predicate.TRUE
+
+	@property
+	def bitmask(self) -> int:
+		"""The true predicates as bits, see :class:`PredicateSymbols`."""
+		return self.__bitmask
 
 	def update(self, other: "Predicates") -> Self:
 		"""It will not remove predicates. Only adds or updates value."""
-		for p in other: self[p] = other[p]
+		if isinstance(other, Predicates):
+			super().update(other)
+			self.__bitmask = (self.__bitmask & ~other.__known) | other.__bitmask
+			self.__known |= other.__known
+		else:
+			for p in other: self[p] = other[p]
 		return self
 
+	def __ior__(self, other: "Predicates") -> Self:
+		return self.update(other)
+
 	def __or__(self, other: "Predicates") -> "Predicates":
-		updated = Predicates([])
-		updated.update(self)
+		updated = Predicates(self)
 		updated.update(other)
 		return updated
 
@@ -44,5 +131,5 @@ class Predicates(dict[str, bool]):
 	@classmethod
 	def fromMsgArray(cls, msgs: list[Msgs.RtBi.Predicate]) -> "Predicates":
 		d = {}
-		for msg in msgs: d[msg.name] = msg.value
+		for msg in msgs: d[msg.name] = Predicates.__asBool(msg.name, msg.value)
 		return Predicates(d)
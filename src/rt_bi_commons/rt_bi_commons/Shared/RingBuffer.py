@@ -0,0 +1,51 @@
+from collections import deque
+from typing import Callable, TypeAlias, TypeVar
+
+numeric: TypeAlias = int | float
+
+DataType = TypeVar("DataType")
+
+class RingBuffer(deque[DataType]):
+	"""
+	A bounded history, where the oldest items are dropped first.
+	The newest item is always kept.
+	"""
+
+	def __init__(self, capacity: int | None = None, window: numeric | None = None, key: Callable[[DataType], numeric] | None = None) -> None:
+		"""
+		Parameters
+		----------
+		capacity : int | None, optional
+			The maximum number of items kept, by default unbounded.
+		window : numeric | None, optional
+			If given, only the items whose key is within `window` of the key of the newest item are kept, by default None.
+		key : Callable[[DataType], numeric] | None, optional
+			A function which returns the key of an item, e.g. its time. Required if `window` is given.
+		"""
+		assert capacity is None or capacity > 0, f"Capacity must be positive, got {capacity}."
+		assert window is None or key is not None, "A key function is required for a window."
+		super().__init__(maxlen=capacity)
+		self.__window = window
+		self.__key = key
+		self.dropped: int = 0
+		"""The number of items dropped so far."""
+		return
+
+	def __reduce__(self) -> tuple:
+		return (self.__class__, (self.maxlen, self.__window, self.__key), { "dropped": self.dropped }, iter(self))
+
+	def __copy__(self) -> "RingBuffer[DataType]":
+		copied = self.__class__(self.maxlen, self.__window, self.__key)
+		copied.extend(self)
+		copied.dropped = self.dropped
+		return copied
+
+	def append(self, item: DataType) -> None:
+		if self.maxlen is not None and len(self) == self.maxlen: self.dropped += 1
+		super().append(item)
+		if self.__window is None or self.__key is None: return
+		newest = self.__key(item)
+		while len(self) > 1 and newest - self.__key(self[0]) > self.__window:
+			self.popleft() # CSpell: ignore -- popleft
+			self.dropped += 1
+		return
@@ -12,7 +12,7 @@ from rt_bi_commons.Utils import Ros
 
 class Shapely:
 	"""This class sets up a group of functions and type aliases that help use shapely objects easier."""
-	from shapely import buffer, convex_hull, get_rings, make_valid, set_precision, union_all
+	from shapely import buffer, convex_hull, get_rings, linestrings, make_valid, prepare, set_precision, union_all
 	from shapely.geometry import GeometryCollection, LinearRing, LineString, MultiLineString, MultiPoint, MultiPolygon, Point, Polygon
 
 	ConnectedComponent: TypeAlias = Polygon | LineString | Point
@@ -0,0 +1,43 @@
+"""This module must not import any `rt_bi` modules."""
+from collections import deque
+from typing import Callable, ClassVar, Generic, TypeVar
+
+from rclpy.callback_groups import CallbackGroup
+from rclpy.node import Node
+
+_T = TypeVar("_T")
+
+class InProcessChannel(Generic[_T]):
+	"""
+	A topic that hands objects over to subscribers in the same process, without serializing them.
+	Published objects are shared by all the subscribers and must be treated as immutable.
+	Each subscriber has its own bounded queue, which drops the oldest object once full.
+	Subscriber callbacks run on the subscriber node's executor, woken up by a guard condition.
+	"""
+	__channels: ClassVar[dict[str, "InProcessChannel"]] = {}
+
+	def __init__(self, name: str) -> None:
+		self.name = name
+		self.__subscribers: list[tuple[deque[_T], Callable[[], None]]] = []
+		return
+
+	@classmethod
+	def Get(cls, name: str) -> "InProcessChannel":
+		"""The channel named `name`, created on first use."""
+		if name not in cls.__channels: cls.__channels[name] = InProcessChannel(name)
+		return cls.__channels[name]
+
+	def publish(self, item: _T) -> None:
+		for (queue, trigger) in self.__subscribers:
+			queue.append(item)
+			trigger()
+		return
+
+	def subscribe(self, node: Node, callbackFunc: Callable[[_T], None], capacity: int = 10, callbackGroup: CallbackGroup | None = None) -> None:
+		queue: deque[_T] = deque(maxlen=capacity)
+		def drain() -> None:
+			while len(queue) > 0: callbackFunc(queue.popleft())
+			return
+		guard = node.create_guard_condition(drain, callbackGroup)
+		self.__subscribers.append((queue, guard.trigger))
+		return
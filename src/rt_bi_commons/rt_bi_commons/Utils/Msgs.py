@@ -1,6 +1,7 @@
 from collections.abc import Sequence
 from typing import AbstractSet, Final, cast
 
+import numpy as np
 from rclpy.clock import Time
 
 from rt_bi_commons.Shared.Pose import Coords, CoordsList, Pose, quatToAngle
@@ -57,8 +58,9 @@ class Msgs:
 		return msg
 
 	@classmethod
-	def toNanoSecs(cls, time: BuiltIn.Time | Time | float) -> int:
-		"""Returns a given time as a single `int` in nano-seconds."""
+	def toNanoSecs(cls, time: BuiltIn.Time | Time | float | int) -> int:
+		"""Returns a given time as a single `int` in nano-seconds. An `int` is already in nano-seconds."""
+		if isinstance(time, int): return time
 		if isinstance(time, cls.BuiltIn.Time):
 			(secs, nanoSecs) = (time.sec, time.nanosec) # CSpell: ignore nanosec
 		elif isinstance(time, Time):
@@ -78,6 +80,11 @@ class Msgs:
 	def toCoordsList(cls, pts: Sequence[Geometry.Point32] | AbstractSet[Geometry.Point32] | list[Geometry.Point32]) -> CoordsList:
 		return [(p.x, p.y) for p in pts]
 
+	@classmethod
+	def toCoordsArray(cls, pts: Sequence[Geometry.Point32] | AbstractSet[Geometry.Point32] | list[Geometry.Point32]) -> np.ndarray:
+		"""The `(n, 2)` array of the coordinates, filled in a single pass without intermediate tuples."""
+		return np.fromiter((c for p in pts for c in (p.x, p.y)), dtype=np.float64, count=2 * len(pts)).reshape(-1, 2)
+
 	@classmethod
 	def toPointMsg(cls, p: Pose | Coords) -> Geometry.Point32:
 		if isinstance(p, Pose): return cls.Geometry.Point32(x=p.x, y=p.y, z=0.0)
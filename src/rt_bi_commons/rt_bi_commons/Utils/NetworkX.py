@@ -2,9 +2,10 @@ from abc import ABC, abstractmethod
 from dataclasses import asdict, dataclass
 
 import networkx as nx
+import numpy as np
 from networkx.algorithms.isomorphism import DiGraphMatcher
 from networkx.algorithms.isomorphism.vf2pp import vf2pp_is_isomorphic
-from typing_extensions import Generic, Literal, LiteralString, Optional, Protocol, Sequence, TypeAlias, TypeVar, cast, final, overload
+from typing_extensions import Final, Generic, Iterable, Iterator, Literal, LiteralString, Optional, Protocol, Sequence, TypeAlias, TypeVar, cast, final, overload
 
 from rt_bi_commons.Shared.NodeId import NodeId
 from rt_bi_commons.Shared.Pose import Coords
@@ -32,13 +33,16 @@ class _PolygonLike(Protocol):
 
 
 _Polygon = TypeVar("_Polygon", bound=_PolygonLike)
+_Graph = TypeVar("_Graph", bound="NxUtils.Graph")
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class NodeData(Generic[_Polygon]):
-	"""The variables of this Class will be stored node attribute key-values."""
+	"""The content of a node. A graph stores a single instance per node and hands it out by reference."""
 	polygon: Optional[_Polygon] = None
 	predicates: Optional[Predicates] = None
 
+_EMPTY_NODE_DATA: Final[NodeData] = NodeData()
+
 @dataclass(frozen=True)
 class EdgeData:
 	isTemporal: bool
@@ -63,6 +67,8 @@ class NxUtils:
 		__RENDER_DELTA_X = 75
 		__RENDER_DELTA_Y = 90
 		__RENDER_DELTA_Z = 75
+		NODE_CONTENT: Final = "content"
+		"""The node attribute that holds the :class:`NodeData` of a node."""
 		def __init__(self, rVizPublisher: Ros.Publisher | None):
 			nx.DiGraph.__init__(self)
 			self.rVizPublisher = rVizPublisher
@@ -81,7 +87,7 @@ class NxUtils:
 
 		def addNode(self, id: NodeId, content: NodeData[_Polygon] | None = None) -> NodeId:
 			assert isinstance(id, NodeId), f"Unexpected Id type: {type(id)}, repr = {repr(id)}"
-			if content is not None: self.add_node(id, **asdict(content))
+			if content is not None: self.add_node(id, **{ NxUtils.Graph.NODE_CONTENT: content })
 			else: self.add_node(id)
 			return id
 
@@ -107,13 +113,12 @@ class NxUtils:
 
 		def getContent(self, node: NodeId, contentKey: LiteralString | None = None) -> NodeData[_Polygon] | _Polygon | Predicates:
 			assert isinstance(node, NodeId), f"Unexpected Id type: {type(node)}, repr = {repr(node)}"
-			if contentKey is None: return NodeData(**self.nodes[node])
+			content: NodeData[_Polygon] = self.nodes[node].get(NxUtils.Graph.NODE_CONTENT, _EMPTY_NODE_DATA)
+			if contentKey is None: return content
 			elif contentKey == "predicates":
-				d = self.getContent(node)
-				if d.predicates is not None: predicates = d.predicates
-				else: predicates = self.getContent(node, "polygon").predicates
-				return predicates
-			else: return self.nodes[node][contentKey]
+				if content.predicates is not None: return content.predicates
+				return cast(_Polygon, content.polygon).predicates
+			else: return getattr(content, contentKey)
 
 		def _3dLayout(self) -> "NxUtils.GraphLayout3D":
 			pos2d = self._multiPartiteLayout2()
@@ -173,6 +178,220 @@ class NxUtils:
 			Ros.Publish(self.rVizPublisher, markerArray)
 			return
 
+	class CompactGraph(Generic[_Polygon]):
+		"""
+			A compact alternative to :class:`NxUtils.Graph` for graphs that grow and shrink a whole layer at a time, i.e., the I-graph.
+
+			Nodes are integer handles grouped in layers by the `hIndex` of their id.
+			Each layer keeps its own node attribute table and the edges that end in it.
+			The edges of a layer are kept as CSR arrays, which are (re)built on the first read after a change.
+			Dropping a layer is therefore a single operation, regardless of the number of its nodes and edges.
+			Use :meth:`toNx` whenever a networkx graph is needed, e.g., for rendering or isomorphism.
+		"""
+
+		class _Layer:
+			__slots__ = ("start", "ids", "contents", "srcs", "dsts", "edgeContents", "csr")
+
+			def __init__(self, start: int) -> None:
+				self.start = start
+				"""The handle of the first node in the layer. The handles of a layer are consecutive."""
+				self.ids: list[NodeId | None] = []
+				"""The id of each handle, offset by `start`. `None` marks a removed node."""
+				self.contents: list[NodeData | None] = []
+				self.srcs: list[int] = []
+				self.dsts: list[int] = []
+				self.edgeContents: list[EdgeData | None] = []
+				self.csr: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None = None
+				"""`(rowHandles, indPtr, indices, edgeIndices)` of the edges ending in this layer, `None` if outdated."""
+
+		def __init__(self) -> None:
+			self.__layers: dict[int, NxUtils.CompactGraph._Layer] = {}
+			self.__handles: dict[NodeId, int] = {}
+			self.__nextHandle = 0
+
+		def __len__(self) -> int:
+			return len(self.__handles)
+
+		def __contains__(self, id_: NodeId) -> bool:
+			if not isinstance(id_, NodeId):
+				Ros.Log(f"NodeId is of invalid type: {type(id_)}.")
+				return False
+			return id_ in self.__handles
+
+		@property
+		def nodes(self) -> list[NodeId]:
+			return list(self.__handles)
+
+		@property
+		def layers(self) -> list[int]:
+			"""The `hIndex` of the layers, oldest first."""
+			return list(self.__layers)
+
+		@property
+		def numberOfEdges(self) -> int:
+			return sum(1 for _ in self.edges())
+
+		def __locate(self, handle: int) -> "tuple[NxUtils.CompactGraph._Layer, int] | None":
+			for layer in reversed(self.__layers.values()):
+				if handle < layer.start: continue
+				i = handle - layer.start
+				if i < len(layer.ids) and layer.ids[i] is not None: return (layer, i)
+				return None
+			return None
+
+		def __idOf(self, handle: int) -> NodeId | None:
+			location = self.__locate(handle)
+			if location is None: return None
+			(layer, i) = location
+			return layer.ids[i]
+
+		def __csr(self, layer: "NxUtils.CompactGraph._Layer") -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+			if layer.csr is not None: return layer.csr
+			srcs = np.asarray(layer.srcs, dtype=np.int64)
+			dsts = np.asarray(layer.dsts, dtype=np.int64)
+			edgeIndices = np.lexsort((dsts, srcs))
+			srcs = srcs[edgeIndices]
+			dsts = dsts[edgeIndices]
+			# Like networkx, adding an edge twice keeps a single edge with the latest content.
+			keep = np.ones(len(srcs), dtype=bool)
+			keep[:-1] = (srcs[1:] != srcs[:-1]) | (dsts[1:] != dsts[:-1])
+			(srcs, dsts, edgeIndices) = (srcs[keep], dsts[keep], edgeIndices[keep])
+			(rowHandles, counts) = np.unique(srcs, return_counts=True)
+			indPtr = np.zeros(len(rowHandles) + 1, dtype=np.int64)
+			np.cumsum(counts, out=indPtr[1:])
+			layer.csr = (rowHandles, indPtr, dsts, edgeIndices)
+			return layer.csr
+
+		def removeNode(self, id_: NodeId) -> None:
+			assert isinstance(id_, NodeId), f"Unexpected Id type: {type(id_)}, repr = {repr(id_)}"
+			assert id_ in self, f"Remove failed: {id_} is not a node in the graph."
+			location = cast(tuple[NxUtils.CompactGraph._Layer, int], self.__locate(self.__handles.pop(id_)))
+			(layer, i) = location
+			layer.ids[i] = None
+			layer.contents[i] = None
+			return
+
+		def removeLayer(self, hIndex: int) -> None:
+			"""Removes all the nodes with the given `hIndex` and the edges incident to them."""
+			layer = self.__layers.pop(hIndex, None)
+			if layer is None: return
+			for id_ in layer.ids:
+				if id_ is not None: self.__handles.pop(id_)
+			return
+
+		def addNode(self, id: NodeId, content: NodeData[_Polygon] | None = None) -> NodeId:
+			assert isinstance(id, NodeId), f"Unexpected Id type: {type(id)}, repr = {repr(id)}"
+			if id in self.__handles:
+				(layer, i) = cast(tuple[NxUtils.CompactGraph._Layer, int], self.__locate(self.__handles[id]))
+				if content is not None: layer.contents[i] = content
+				return id
+			if id.hIndex not in self.__layers:
+				self.__layers[id.hIndex] = NxUtils.CompactGraph._Layer(self.__nextHandle)
+			layer = self.__layers[id.hIndex]
+			assert layer.start + len(layer.ids) == self.__nextHandle, f"Nodes can only be added to the newest layer: {id}"
+			layer.ids.append(id)
+			layer.contents.append(content)
+			self.__handles[id] = self.__nextHandle
+			self.__nextHandle += 1
+			return id
+
+		def __addEdge(self, frmId: NodeId, toId: NodeId, content: EdgeData | None) -> None:
+			layer = self.__layers[toId.hIndex]
+			layer.srcs.append(self.__handles[frmId])
+			layer.dsts.append(self.__handles[toId])
+			layer.edgeContents.append(content)
+			layer.csr = None
+			return
+
+		def addEdge(self, frmId: NodeId, toId: NodeId, addReverseEdge=False, content: EdgeData | None = None) -> None:
+			if frmId not in self: raise AssertionError(f"{frmId} is not a node in the graph.")
+			if toId not in self: raise AssertionError(f"{toId} is not a node in the graph.")
+			if frmId == toId: raise AssertionError(f"No loop-back edge! {frmId}")
+			self.__addEdge(frmId, toId, content)
+			if not addReverseEdge: return
+			self.__addEdge(toId, frmId, content)
+			return
+
+		@overload
+		def getContent(self, node: NodeId) -> NodeData[_Polygon]: ...
+		@overload
+		def getContent(self, node: NodeId, contentKey: None) -> NodeData[_Polygon]: ...
+		@overload
+		def getContent(self, node: NodeId, contentKey: Literal["polygon"]) -> _Polygon: ...
+		@overload
+		def getContent(self, node: NodeId, contentKey: Literal["predicates"]) -> Predicates: ...
+
+		def getContent(self, node: NodeId, contentKey: LiteralString | None = None) -> NodeData[_Polygon] | _Polygon | Predicates:
+			assert isinstance(node, NodeId), f"Unexpected Id type: {type(node)}, repr = {repr(node)}"
+			(layer, i) = cast(tuple[NxUtils.CompactGraph._Layer, int], self.__locate(self.__handles[node]))
+			content = layer.contents[i]
+			if content is None: content = _EMPTY_NODE_DATA
+			if contentKey is None: return content
+			elif contentKey == "predicates":
+				if content.predicates is not None: return content.predicates
+				return cast(_Polygon, content.polygon).predicates
+			else: return getattr(content, contentKey)
+
+		def successors(self, node: NodeId) -> list[NodeId]:
+			handle = self.__handles[node]
+			successors: list[NodeId] = []
+			for layer in self.__layers.values():
+				(rowHandles, indPtr, indices, _) = self.__csr(layer)
+				row = int(np.searchsorted(rowHandles, handle))
+				if row == len(rowHandles) or rowHandles[row] != handle: continue
+				for dst in indices[indPtr[row]:indPtr[row + 1]]:
+					to = self.__idOf(int(dst))
+					if to is not None: successors.append(to)
+			return successors
+
+		def edges(self, hIndices: Iterable[int] | None = None) -> Iterator[tuple[NodeId, NodeId, EdgeData | None]]:
+			"""Yields `(frmId, toId, content)` of the edges that end in the given layers, all layers by default."""
+			for hIndex in (self.__layers if hIndices is None else hIndices):
+				if hIndex not in self.__layers: continue
+				layer = self.__layers[hIndex]
+				(rowHandles, indPtr, indices, edgeIndices) = self.__csr(layer)
+				for row in range(len(rowHandles)):
+					frm = self.__idOf(int(rowHandles[row]))
+					if frm is None: continue
+					for k in range(indPtr[row], indPtr[row + 1]):
+						to = self.__idOf(int(indices[k]))
+						if to is None: continue
+						yield (frm, to, layer.edgeContents[int(edgeIndices[k])])
+			return
+
+		def toNx(self, graph: _Graph, hIndices: Iterable[int] | None = None) -> _Graph:
+			"""Adds the nodes of the given layers, all layers by default, and the edges among them to `graph` and returns it."""
+			selected = set(self.__layers) if hIndices is None else set(hIndices)
+			for hIndex in self.__layers:
+				if hIndex not in selected: continue
+				layer = self.__layers[hIndex]
+				for (id_, content) in zip(layer.ids, layer.contents):
+					if id_ is not None: graph.addNode(id_, content)
+			for (frm, to, content) in self.edges(selected):
+				if frm.hIndex in selected: graph.addEdge(frm, to, content=content)
+			return graph
+
+	class CsrView:
+		"""A read-only CSR snapshot of the successors in a graph."""
+		def __init__(self, graph: nx.DiGraph) -> None:
+			self.nodes: list[NodeId] = list(graph.nodes)
+			self.index: dict[NodeId, int] = { id_: i for (i, id_) in enumerate(self.nodes) }
+			degrees = np.fromiter((graph.out_degree(id_) for id_ in self.nodes), dtype=np.int64, count=len(self.nodes))
+			self.indPtr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+			np.cumsum(degrees, out=self.indPtr[1:])
+			self.indices = np.fromiter(
+				(self.index[to] for id_ in self.nodes for to in graph.successors(id_)),
+				dtype=np.int64,
+				count=int(self.indPtr[-1]),
+			)
+			return
+
+		def successors(self, id_: NodeId) -> list[NodeId]:
+			"""The successors of `id_`, in the order of the graph's adjacency. A node missing from the graph has none."""
+			row = self.index.get(id_, -1)
+			if row < 0: return []
+			return [self.nodes[i] for i in self.indices[self.indPtr[row] : self.indPtr[row + 1]].tolist()]
+
 	class GraphMatcher(DiGraphMatcher):
 		def __init__(self, G1: "NxUtils.Graph", G2: "NxUtils.Graph", metricDistanceLimit: int):
 			self.G1 = G1
@@ -3,13 +3,16 @@ import csv
 import datetime
 import logging
 import os
+import threading
 from functools import partial
 from math import inf, isnan, nan
 from pathlib import Path
 from typing import AbstractSet, Any, Callable, Iterable, Sequence, TypeAlias, TypeVar, cast
 
 import rclpy
+from rclpy.callback_groups import CallbackGroup
 from rclpy.clock import Time
+from rclpy.executors import MultiThreadedExecutor
 from rclpy.impl.rcutils_logger import RcutilsLogger
 from rclpy.logging import LoggingSeverity
 from rclpy.node import Client, Node, Publisher, Service, Subscription, Timer
@@ -90,7 +93,7 @@ def Now(node: Node | None) -> Time:
 		raise RuntimeError("ROS context not OK!")
 	return rclpy.get_global_executor()._clock.now()
 
-def CreatePublisher(node: Node, topic: type[__Topic], topicName: str, callbackFunc: Callable = lambda _: None, intervalSecs: float = nan) -> tuple[Publisher, Timer | None]:
+def CreatePublisher(node: Node, topic: type[__Topic], topicName: str, callbackFunc: Callable = lambda _: None, intervalSecs: float = nan, callbackGroup: CallbackGroup | None = None) -> tuple[Publisher, Timer | None]:
 	"""
 	Create and return the tuple of `(Publisher, Timer | None)`.
 
@@ -107,13 +110,15 @@ def CreatePublisher(node: Node, topic: type[__Topic], topicName: str, callbackFu
 	`interval : int`
 		The interval in seconds between each time the topic is published.
 		If `nan` (not an number) is given, topics must be published manually.
+	`callbackGroup : CallbackGroup | None`
+		The callback group of the timer, by default the node's default group.
 
 	Returns
 	-------
 	`Tuple[Publisher, Union[Timer, None]]`
 	"""
 	publisher = node.create_publisher(topic, topicName, 10)
-	timer = None if isnan(intervalSecs) else node.create_timer(intervalSecs, callbackFunc)
+	timer = None if isnan(intervalSecs) else node.create_timer(intervalSecs, callbackFunc, callbackGroup)
 	try:
 		freq = f" @ {(1 / intervalSecs):.2f}Hz"
 	except:
@@ -121,7 +126,7 @@ def CreatePublisher(node: Node, topic: type[__Topic], topicName: str, callbackFu
 	node.get_logger().debug(f"{node.get_fully_qualified_name()} publishes topic \"{topicName}\"{freq}")
 	return (publisher, timer)
 
-def CreateSubscriber(node: Node, topic: type[__Topic], topicName: str, callbackFunc: Callable[[__Topic], None]) -> Subscription:
+def CreateSubscriber(node: Node, topic: type[__Topic], topicName: str, callbackFunc: Callable[[__Topic], None], callbackGroup: CallbackGroup | None = None) -> Subscription:
 	"""
 	Create and return the `Subscription`.
 
@@ -135,12 +140,14 @@ def CreateSubscriber(node: Node, topic: type[__Topic], topicName: str, callbackF
 		The string name of the topic
 	`callbackFunc : Callable[[], None]`
 		The function callback that would be called when the topic is received
+	`callbackGroup : CallbackGroup | None`
+		The callback group of the subscription, by default the node's default group.
 
 	Returns
 	-------
 	`Subscription`
 	"""
-	subscription = node.create_subscription(topic, topicName, callbackFunc, 10)
+	subscription = node.create_subscription(topic, topicName, callbackFunc, 10, callback_group=callbackGroup)
 	node.get_logger().debug(f"{node.get_fully_qualified_name()} subscribed to \"{topicName}\"")
 	return subscription
 
@@ -202,29 +209,36 @@ def ConcatMessageArray(first: Sequence[__Topic] | AbstractSet[__Topic] | list[__
 	first += second
 	return
 
-def CreateTimer(node: Node, callback: Callable, intervalNs = 1000) -> Timer:
-	return Timer(callback, None, intervalNs, node.get_clock(), context=node.context)
+def CreateTimer(node: Node, callback: Callable, intervalNs = 1000, callbackGroup: CallbackGroup | None = None) -> Timer:
+	return Timer(callback, callbackGroup, intervalNs, node.get_clock(), context=node.context)
 
 __ServiceInterface_Request = TypeVar("__ServiceInterface_Request")
 __ServiceInterface_Response = TypeVar("__ServiceInterface_Response")
 __ServiceInterface = TypeVar("__ServiceInterface")
 
-def CreateService(node: Node, interface: __ServiceInterface, serviceName: str, callbackFunc: Callable[[__ServiceInterface_Request, __ServiceInterface_Response], __ServiceInterface_Response]) -> Service: # pyright: ignore[reportInvalidTypeVarUse]
+def CreateService(node: Node, interface: __ServiceInterface, serviceName: str, callbackFunc: Callable[[__ServiceInterface_Request, __ServiceInterface_Response], __ServiceInterface_Response], callbackGroup: CallbackGroup | None = None) -> Service: # pyright: ignore[reportInvalidTypeVarUse]
 	l = list(filter(lambda s: s.srv_name == serviceName, node.services))
-	if len(l) == 0: return node.create_service(interface, serviceName, callbackFunc)
+	if len(l) == 0: return node.create_service(interface, serviceName, callbackFunc, callback_group=callbackGroup)
 	if len(l) == 1: return l[0]
 	raise RuntimeError("This should never happen.")
 
-def CreateClient(node: Node, interface: __ServiceInterface, serviceName: str) -> Client: # pyright: ignore[reportInvalidTypeVarUse]
+def CreateClient(node: Node, interface: __ServiceInterface, serviceName: str, callbackGroup: CallbackGroup | None = None) -> Client: # pyright: ignore[reportInvalidTypeVarUse]
 	l = list(filter(lambda s: s.srv_name == serviceName, node.clients))
-	if len(l) == 0: return node.create_client(interface, serviceName)
+	if len(l) == 0: return node.create_client(interface, serviceName, callback_group=callbackGroup)
 	if len(l) == 1: return l[0]
 	raise RuntimeError("This should never happen.")
 
 def SendClientRequest(node: Node, client: Client, request: __ServiceInterface_Request, responseCallback: Callable[[__ServiceInterface_Request, __ServiceInterface_Response], __ServiceInterface_Response] | None = None) -> None:
 	if responseCallback is None: responseCallback = lambda _1, _2: _2
 	future = client.call_async(request)
-	rclpy.spin_until_future_complete(node, future)
+	if isinstance(node.executor, MultiThreadedExecutor):
+		# The node is already spinning, another thread of its executor completes the future.
+		# The client must be in a reentrant group, or this deadlocks when called from a callback of its group.
+		done = threading.Event()
+		future.add_done_callback(lambda _: done.set())
+		done.wait()
+	else:
+		rclpy.spin_until_future_complete(node, future)
 	responseCallback(request, cast(__ServiceInterface_Response, future.result()))
 	return None
 
@@ -258,6 +272,9 @@ ReductionStats: list[tuple[int, int, int]] = []
 MessageStats: dict[str, list[tuple[int, int]]] = {}
 """`topic`: [(`timeNS`, `count`)]"""
 
+IngestStats: list[tuple[int, int, int, int]] = []
+"""[(`timeNS`, `queue depth`, `queued ns`, `processing ns`)], only recorded by profiling nodes."""
+
 def Publish(publisher: Publisher, msg: Any) -> None:
 	if publisher.topic not in MessageStats:
 		MessageStats[publisher.topic] = []
@@ -304,3 +321,21 @@ def LogReductionStats() -> None:
 		for stat in ReductionStats:
 			writer.writerow(stat)
 	return
+
+def RecordIngestStats(timeNS: int, queueDepth: int, queuedNs: int, processingNs: int) -> None:
+	IngestStats.append((timeNS, queueDepth, queuedNs, processingNs))
+	return
+
+def LogIngestStats() -> None:
+	if len(IngestStats) == 0: return
+	now = datetime.datetime.now()
+	date = now.strftime("%Y-%m-%d--%H-%M-%S")
+	dir = f"/home/reza/git/behavior-inference/log-rtbi/stats/{date}"
+	fileName = "ingest.csv"
+	filePath = Path(f"{dir}/{fileName}").absolute()
+	filePath.parent.mkdir(parents=True, exist_ok=True)
+	with open(filePath, mode="w", newline="") as file:
+		writer = csv.writer(file)
+		for stat in IngestStats:
+			writer.writerow(stat)
+	return
@@ -5,7 +5,9 @@ from rclpy.node import Client, Publisher, Service, Timer
 from typing_extensions import Callable, NamedTuple, deprecated
 
 from rt_bi_commons.Base.RtBiNode import RtBiNode
+from rt_bi_commons.Shared.IGraphDelta import IGraphDelta
 from rt_bi_commons.Utils import Ros
+from rt_bi_commons.Utils.InProcessChannel import InProcessChannel
 from rt_bi_commons.Utils.Msgs import Msgs
 
 
@@ -35,6 +37,7 @@ class RtBiInterfaces:
 		RT_BI_EMULATOR_KNOWN = "/__rt_bi_emulator/known"
 		RT_BI_EMULATOR_MAP = "/__rt_bi_runtime/map"
 		RT_BI_EMULATOR_SENSOR = "/__rt_bi_emulator/sensor"
+		RT_BI_EMULATOR_SENSOR_PACKED = "/__rt_bi_emulator/sensor_packed"
 		RT_BI_EMULATOR_TARGET = "/__rt_bi_emulator/target"
 		RT_BI_EVENTIFIER_IGRAPH = "/__rt_bi_eventifier/b_igraph"
 		RT_BI_EVENTIFIER_ISOMORPHISM = "/__rt_bi_eventifier/isomorphism"
@@ -47,11 +50,11 @@ class RtBiInterfaces:
 
 	@staticmethod
 	def createSpacePublisher(node: RtBiNode, topic: TopicNames, callbackFunc: Callable = lambda: None, intervalSecs: float = nan) -> tuple[Publisher, Timer | None]:
-		return Ros.CreatePublisher(node, Msgs.RtBi.RegularSetArray, topic.value, callbackFunc, intervalSecs)
+		return Ros.CreatePublisher(node, Msgs.RtBi.RegularSetArray, topic.value, callbackFunc, intervalSecs, node.processingGroup)
 
 	@staticmethod
 	def subscribeToSpace(node: RtBiNode, topic: TopicNames, callbackFunc: Callable[[Msgs.RtBi.RegularSetArray], None]) -> None:
-		Ros.CreateSubscriber(node, Msgs.RtBi.RegularSetArray, topic.value, callbackFunc)
+		Ros.CreateSubscriber(node, Msgs.RtBi.RegularSetArray, topic.value, callbackFunc, node.ingestGroup)
 		return
 
 	@staticmethod
@@ -63,6 +66,17 @@ class RtBiInterfaces:
 		RtBiInterfaces.subscribeToSpace(node, RtBiInterfaces.TopicNames.RT_BI_EMULATOR_SENSOR, callbackFunc)
 		return
 
+	@staticmethod
+	def createPackedSensorPublisher(node: RtBiNode, callbackFunc: Callable = lambda: None, intervalSecs: float = nan) -> tuple[Publisher, Timer | None]:
+		topic = RtBiInterfaces.TopicNames.RT_BI_EMULATOR_SENSOR_PACKED.value
+		return Ros.CreatePublisher(node, Msgs.RtBi.PackedRegularSetArray, topic, callbackFunc, intervalSecs, node.processingGroup)
+
+	@staticmethod
+	def subscribeToPackedSensors(node: RtBiNode, callbackFunc: Callable[[Msgs.RtBi.PackedRegularSetArray], None]) -> None:
+		topic = RtBiInterfaces.TopicNames.RT_BI_EMULATOR_SENSOR_PACKED.value
+		Ros.CreateSubscriber(node, Msgs.RtBi.PackedRegularSetArray, topic, callbackFunc, node.ingestGroup)
+		return
+
 	@staticmethod
 	def createKnownRegionPublisher(node: RtBiNode, callbackFunc: Callable = lambda: None, intervalSecs: float = nan) -> tuple[Publisher, Timer | None]:
 		return RtBiInterfaces.createSpacePublisher(node, RtBiInterfaces.TopicNames.RT_BI_EMULATOR_KNOWN, callbackFunc, intervalSecs)
@@ -98,30 +112,30 @@ class RtBiInterfaces:
 
 	@staticmethod
 	def subscribeToPredicates(node: RtBiNode, callbackFunc: Callable[[str], None]) -> None:
-		Ros.CreateSubscriber(node, Msgs.Std.String, RtBiInterfaces.TopicNames.RT_BI_RUNTIME_PREDICATES.value, lambda m: callbackFunc(m.data))
+		Ros.CreateSubscriber(node, Msgs.Std.String, RtBiInterfaces.TopicNames.RT_BI_RUNTIME_PREDICATES.value, lambda m: callbackFunc(m.data), node.ingestGroup)
 		return
 
 	@deprecated("Data ref nodes are replaced by RDF", category=None)
 	@staticmethod
 	def createDataReferenceService(node: RtBiNode, paramName: str, callbackFunc: Callable[[Msgs.RtBiSrv.DataReference.Request, Msgs.RtBiSrv.DataReference.Response], Msgs.RtBiSrv.DataReference.Response]) -> Service:
 		ddServiceName = RtBiNode.toServiceName(node.get_name(), paramName)
-		return Ros.CreateService(node, Msgs.RtBiSrv.DataReference, ddServiceName, callbackFunc)
+		return Ros.CreateService(node, Msgs.RtBiSrv.DataReference, ddServiceName, callbackFunc, node.serviceGroup)
 
 	@deprecated("Data ref nodes are replaced by RDF", category=None)
 	@staticmethod
 	def createDataReferenceClient(node: RtBiNode, ref: ReferenceDescriptor) -> Client:
-		return Ros.CreateClient(node, Msgs.RtBiSrv.DataReference, ref.serviceName)
+		return Ros.CreateClient(node, Msgs.RtBiSrv.DataReference, ref.serviceName, node.clientGroup)
 
 	@staticmethod
 	def createSpaceTimeService(node: RtBiNode, callbackFunc: Callable[[Msgs.RtBiSrv.SpaceTime.Request, Msgs.RtBiSrv.SpaceTime.Response], Msgs.RtBiSrv.SpaceTime.Response]) -> Service:
 		svcName = f"{RtBiInterfaces.ServiceNames.RT_BI_RUNTIME_DD_RDF.value}/space_time"
-		svc = Ros.CreateService(node, Msgs.RtBiSrv.SpaceTime, svcName, callbackFunc)
+		svc = Ros.CreateService(node, Msgs.RtBiSrv.SpaceTime, svcName, callbackFunc, node.serviceGroup)
 		return svc
 
 	@staticmethod
 	def createSpaceTimeClient(node: RtBiNode) -> Client:
 		svcName = f"{RtBiInterfaces.ServiceNames.RT_BI_RUNTIME_DD_RDF.value}/space_time"
-		return Ros.CreateClient(node, Msgs.RtBiSrv.SpaceTime, svcName)
+		return Ros.CreateClient(node, Msgs.RtBiSrv.SpaceTime, svcName, node.clientGroup)
 
 	@staticmethod
 	def createColdStartPublisher(node: RtBiNode) -> Publisher:
@@ -130,7 +144,7 @@ class RtBiInterfaces:
 
 	@staticmethod
 	def subscribeToColdStart(node: RtBiNode, callbackFunc: Callable[[Msgs.RtBi.ColdStart], None]) -> None:
-		Ros.CreateSubscriber(node, Msgs.RtBi.ColdStart, RtBiInterfaces.TopicNames.RT_BI_RUNTIME_COLD_START.value, callbackFunc)
+		Ros.CreateSubscriber(node, Msgs.RtBi.ColdStart, RtBiInterfaces.TopicNames.RT_BI_RUNTIME_COLD_START.value, callbackFunc, node.ingestGroup)
 		return
 
 	@staticmethod
@@ -140,7 +154,17 @@ class RtBiInterfaces:
 
 	@staticmethod
 	def subscribeToIGraph(node: RtBiNode, callbackFunc: Callable[[Msgs.RtBi.IGraph], None]) -> None:
-		Ros.CreateSubscriber(node, Msgs.RtBi.IGraph, RtBiInterfaces.TopicNames.RT_BI_EVENTIFIER_IGRAPH.value, callbackFunc)
+		Ros.CreateSubscriber(node, Msgs.RtBi.IGraph, RtBiInterfaces.TopicNames.RT_BI_EVENTIFIER_IGRAPH.value, callbackFunc, node.ingestGroup)
+		return
+
+	@staticmethod
+	def createInProcessIGraphChannel() -> "InProcessChannel[IGraphDelta]":
+		"""The in-process counterpart of the I-graph topic, for nodes that share a process with the eventifier."""
+		return InProcessChannel.Get(RtBiInterfaces.TopicNames.RT_BI_EVENTIFIER_IGRAPH.value)
+
+	@staticmethod
+	def subscribeToInProcessIGraph(node: RtBiNode, callbackFunc: Callable[[IGraphDelta], None]) -> None:
+		RtBiInterfaces.createInProcessIGraphChannel().subscribe(node, callbackFunc, callbackGroup=node.ingestGroup)
 		return
 
 	@staticmethod
@@ -150,5 +174,5 @@ class RtBiInterfaces:
 
 	@staticmethod
 	def subscribeToIsomorphism(node: RtBiNode, callbackFunc: Callable[[Msgs.RtBi.Isomorphism], None]) -> None:
-		Ros.CreateSubscriber(node, Msgs.RtBi.Isomorphism, RtBiInterfaces.TopicNames.RT_BI_EVENTIFIER_ISOMORPHISM.value, callbackFunc)
+		Ros.CreateSubscriber(node, Msgs.RtBi.Isomorphism, RtBiInterfaces.TopicNames.RT_BI_EVENTIFIER_ISOMORPHISM.value, callbackFunc, node.ingestGroup)
 		return
@@ -20,6 +20,7 @@ setup(
 		"shapely~=2.0.1",
 		"typing_extensions~=4.9.0",
 	],
+	tests_require=["pytest"],
 	zip_safe=True,
 	maintainer="Reza Teshnizi",
 	maintainer_email="reza.teshnizi@gmail.com",
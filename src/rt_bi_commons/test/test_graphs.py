@@ -0,0 +1,55 @@
+import random
+
+import networkx as nx
+import pytest
+
+from rt_bi_commons.Shared.NodeId import NodeId
+from rt_bi_commons.Utils.NetworkX import EdgeData, NxUtils
+
+
+def nodeId(hIndex: int, region: int) -> NodeId:
+	return NodeId(hIndex, hIndex, f"r{region}", "p", "")
+
+def randomGraphs(rnd: random.Random) -> tuple[NxUtils.CompactGraph, nx.DiGraph]:
+	"""A compact graph and a networkx graph, built and trimmed alike, a layer at a time."""
+	compact: NxUtils.CompactGraph = NxUtils.CompactGraph()
+	reference = nx.DiGraph()
+	for hIndex in range(8):
+		ids = [nodeId(hIndex, r) for r in range(rnd.randrange(1, 6))]
+		for id_ in ids:
+			compact.addNode(id_)
+			reference.add_node(id_)
+		older = [id_ for id_ in reference.nodes if id_.hIndex == hIndex - 1]
+		for to in ids:
+			for frm in older + ids:
+				if frm == to or rnd.random() > 0.4: continue
+				content = EdgeData(isTemporal=frm.hIndex != to.hIndex)
+				compact.addEdge(frm, to, content=content)
+				reference.add_edge(frm, to, **vars(content))
+		if hIndex >= 3 and rnd.random() < 0.5:
+			compact.removeLayer(hIndex - 3)
+			reference.remove_nodes_from([id_ for id_ in list(reference.nodes) if id_.hIndex == hIndex - 3])
+		if rnd.random() < 0.3:
+			removed = rnd.choice(ids)
+			compact.removeNode(removed)
+			reference.remove_node(removed)
+	return (compact, reference)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compact_graph_matches_networkx(seed: int) -> None:
+	(compact, reference) = randomGraphs(random.Random(seed))
+	assert set(compact.nodes) == set(reference.nodes)
+	assert { (frm, to): content for (frm, to, content) in compact.edges() } == {
+		(frm, to): EdgeData(**data) for (frm, to, data) in reference.edges(data=True)
+	}
+	for id_ in reference.nodes: assert set(compact.successors(id_)) == set(reference.successors(id_))
+	return
+
+@pytest.mark.parametrize("seed", range(20))
+def test_csr_view_matches_networkx(seed: int) -> None:
+	(_, reference) = randomGraphs(random.Random(seed))
+	csr = NxUtils.CsrView(reference)
+	assert csr.nodes == list(reference.nodes)
+	for id_ in reference.nodes: assert csr.successors(id_) == list(reference.successors(id_))
+	assert csr.successors(nodeId(100, 0)) == []
+	return
@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from rt_bi_commons.Shared.IGraphDelta import IGraphDelta, LayerDelta
+from rt_bi_commons.Shared.NodeId import NodeId
+from rt_bi_commons.Shared.Predicates import Predicates
+
+PREDICATES = [f"p_{i}" for i in range(11)]
+
+def nodeId(hIndex: int, region: int, subPart: str = "") -> NodeId:
+	return NodeId(hIndex, 1000 * hIndex + region, f"https://example.org/region{region}", f"#polygon{region % 3}", subPart)
+
+def randomLayer(rnd: random.Random, hIndex: int, older: list[NodeId]) -> LayerDelta:
+	ids = [nodeId(hIndex, r, "" if rnd.random() < 0.5 else f"{hIndex}.{r}") for r in range(rnd.randrange(1, 7))]
+	# Each node carries its own subset of the predicates.
+	nodes = tuple((id_, Predicates({ p: rnd.random() < 0.5 for p in PREDICATES if rnd.random() < 0.7 })) for id_ in ids)
+	edges: list[tuple[NodeId, NodeId]] = []
+	for to in ids:
+		for frm in older + ids:
+			if frm != to and rnd.random() < 0.3: edges.append((frm, to))
+	return LayerDelta(hIndex, nodes, tuple(edges))
+
+def randomDelta(rnd: random.Random, seq: int, keyframe: bool) -> IGraphDelta:
+	older = [nodeId(seq - 1, r) for r in range(3)]
+	added: list[LayerDelta] = []
+	for hIndex in range(seq, seq + (2 if keyframe else 1)):
+		added.append(randomLayer(rnd, hIndex, older))
+		older = [id_ for (id_, _) in added[-1].nodes]
+	return IGraphDelta(seq, keyframe, (seq - 3,) if seq >= 3 else (), tuple(added))
+
+def normalized(delta: IGraphDelta) -> IGraphDelta:
+	"""The edges of a layer are not ordered on the wire."""
+	added = tuple(LayerDelta(layer.hIndex, layer.nodes, tuple(sorted(layer.edges))) for layer in delta.added)
+	return IGraphDelta(delta.seq, delta.keyframe, delta.removed, added)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_round_trip(seed: int) -> None:
+	rnd = random.Random(seed)
+	delta = randomDelta(rnd, rnd.randrange(10), keyframe=seed % 2 == 0)
+	assert normalized(IGraphDelta.fromMsg(delta.toMsg())) == normalized(delta)
+	return
+
+def test_round_trip_of_empty_delta() -> None:
+	delta = IGraphDelta(7, False, (4,), ())
+	assert IGraphDelta.fromMsg(delta.toMsg()) == delta
+	return
+
+def test_edges_from_older_layers_are_referenced_not_added() -> None:
+	old = nodeId(0, 0)
+	new = nodeId(1, 0)
+	delta = IGraphDelta(1, False, (), (LayerDelta(1, ((new, Predicates({ "p_0": True })),), ((old, new),)),))
+	msg = delta.toMsg()
+	assert msg.added_count == 1
+	assert len(msg.node_h_index) == 2
+	assert IGraphDelta.fromMsg(msg) == delta
+	return
+
+def test_predicates_a_node_does_not_carry_are_not_added() -> None:
+	(first, second) = (nodeId(1, 0), nodeId(1, 1))
+	nodes = ((first, Predicates({ "p_0": True, "p_1": False })), (second, Predicates({ "p_2": False })))
+	delta = IGraphDelta(1, False, (), (LayerDelta(1, nodes, ()),))
+	decoded = IGraphDelta.fromMsg(delta.toMsg())
+	assert [dict(preds) for (_, preds) in decoded.added[0].nodes] == [{ "p_0": True, "p_1": False }, { "p_2": False }]
+	assert [preds.bitmask for (_, preds) in decoded.added[0].nodes] == [preds.bitmask for (_, preds) in nodes]
+	return
@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+import pytest
+
+from rt_bi_commons.Shared.PackedRegularSet import PackedRegularSet
+from rt_bi_commons.Shared.Pose import Pose
+from rt_bi_commons.Shared.Predicates import Predicates
+from rt_bi_commons.Utils.Msgs import Msgs
+
+
+def quarter(rnd: random.Random) -> float:
+	"""A coordinate that a `float32` holds exactly."""
+	return rnd.randrange(-4000, 4000) / 4
+
+def randomSet(rnd: random.Random, i: int) -> Msgs.RtBi.RegularSet:
+	msg = Msgs.RtBi.RegularSet()
+	msg.id = f"https://example.org/sensor{i % 3}"
+	msg.set_type = rnd.choice([Msgs.RtBi.RegularSet.SENSING, Msgs.RtBi.RegularSet.TARGET, Msgs.RtBi.RegularSet.AFFINE])
+	msg.channel = rnd.choice(["", "channel"])
+	msg.stamp = Msgs.toTimeMsg(1_000_000_000 * i + rnd.randrange(1_000_000_000))
+	msg.predicates = Predicates({ f"p_{j}": rnd.random() < 0.5 for j in range(rnd.randrange(12)) }).asMsgArr()
+	msg.polygons = []
+	for j in range(rnd.randrange(3)):
+		polygon = Msgs.RtBi.Polygon()
+		polygon.id = f"#polygon{j}"
+		polygon.region = Msgs.Geometry.Polygon(points=[Msgs.toPointMsg((quarter(rnd), quarter(rnd))) for _ in range(rnd.randrange(3, 9))])
+		polygon.center_of_rotation = Msgs.toPointMsg((quarter(rnd), quarter(rnd)))
+		msg.polygons.append(polygon)
+	msg.estimations = []
+	for j in range(rnd.randrange(4)):
+		tracklet = Msgs.RtBi.Tracklet(entered=rnd.random() < 0.5, exited=rnd.random() < 0.5)
+		tracklet.id = f"target{j}"
+		tracklet.pose = Msgs.toPoseMsg(Pose(0, quarter(rnd), quarter(rnd), rnd.uniform(-3.0, 3.0)))
+		msg.estimations.append(tracklet)
+	return msg
+
+@pytest.mark.parametrize("seed", range(20))
+def test_round_trip(seed: int) -> None:
+	rnd = random.Random(seed)
+	sets = [randomSet(rnd, i) for i in range(rnd.randrange(1, 6))]
+	decoded = PackedRegularSet.fromMsg(PackedRegularSet.toMsg(sets))
+	assert len(decoded) == len(sets)
+	for (packed, msg) in zip(decoded, sets):
+		assert (packed.id, packed.set_type, packed.channel) == (msg.id, msg.set_type, msg.channel)
+		assert packed.stamp == Msgs.toNanoSecs(msg.stamp)
+		assert packed.predicates == Predicates.fromMsgArray(msg.predicates)
+		assert [polygon.id for polygon in packed.polygons] == [polygon.id for polygon in msg.polygons]
+		for (polygon, polyMsg) in zip(packed.polygons, msg.polygons):
+			assert np.array_equal(polygon.coords, Msgs.toCoordsArray(polyMsg.region.points))
+			assert polygon.centerOfRotation == Msgs.toCoords(polyMsg.center_of_rotation)
+		assert [tracklet.id for tracklet in packed.estimations] == [tracklet.id for tracklet in msg.estimations]
+		for (tracklet, trackletMsg) in zip(packed.estimations, msg.estimations):
+			assert (tracklet.x, tracklet.y) == (trackletMsg.pose.position.x, trackletMsg.pose.position.y)
+			assert tracklet.angleFromX == pytest.approx(Msgs.toAngle(trackletMsg.pose.orientation), abs=1e-6)
+			assert (tracklet.entered, tracklet.exited) == (trackletMsg.entered, trackletMsg.exited)
+	return
+
+def test_vertices_are_views_into_the_message() -> None:
+	rnd = random.Random(0)
+	sets = [randomSet(rnd, i) for i in range(8)]
+	msg = PackedRegularSet.toMsg(sets)
+	coords = np.frombuffer(msg.coords, dtype=np.float32)
+	polygons = [polygon for packed in PackedRegularSet.fromMsg(msg) for polygon in packed.polygons]
+	assert len(polygons) > 0
+	for polygon in polygons: assert np.shares_memory(polygon.coords, coords)
+	return
+
+def test_empty_array() -> None:
+	assert PackedRegularSet.fromMsg(PackedRegularSet.toMsg([])) == []
+	return
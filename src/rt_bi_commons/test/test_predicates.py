@@ -0,0 +1,25 @@
+from rt_bi_commons.Shared.Predicates import Predicates, PredicateSymbols
+
+
+def assigned(values: dict) -> Predicates:
+	predicates = Predicates()
+	for (p, val) in values.items(): predicates[p] = val
+	return predicates
+
+def test_construction_converts_like_assignment() -> None:
+	values = { "x": "false", "y": "true", "z": True, "w": False }
+	(constructed, expected) = (Predicates(values), assigned(values))
+	assert dict(constructed) == dict(expected) == { "x": False, "y": True, "z": True, "w": False }
+	assert constructed.bitmask == expected.bitmask
+	return
+
+def test_bitmask_follows_changes() -> None:
+	predicates = Predicates({ "x": True, "y": False })
+	predicates["y"] = "true"
+	del predicates["x"]
+	predicates |= Predicates({ "z": True, "y": False })
+	assert dict(predicates) == { "y": False, "z": True }
+	assert predicates.bitmask == 1 << PredicateSymbols.bit("z")
+	predicates.clear()
+	assert predicates.bitmask == 0
+	return
@@ -0,0 +1,46 @@
+import copy
+import pickle
+
+from rt_bi_commons.Shared.RingBuffer import RingBuffer
+
+
+def test_capacity_keeps_the_newest() -> None:
+	buffer: RingBuffer[int] = RingBuffer(capacity=3)
+	for i in range(5): buffer.append(i)
+	assert list(buffer) == [2, 3, 4]
+	assert buffer.dropped == 2
+	return
+
+def test_window_keeps_the_newest_even_if_alone() -> None:
+	buffer: RingBuffer[int] = RingBuffer(window=2, key=lambda i: i)
+	for i in [0, 1, 2, 3, 10]: buffer.append(i)
+	assert list(buffer) == [10]
+	assert buffer.dropped == 4
+	return
+
+def test_unbounded() -> None:
+	buffer: RingBuffer[int] = RingBuffer()
+	for i in range(100): buffer.append(i)
+	assert len(buffer) == 100
+	assert buffer.dropped == 0
+	return
+
+def test_copies_keep_the_bounds() -> None:
+	buffer: RingBuffer[int] = RingBuffer(capacity=3)
+	for i in range(5): buffer.append(i)
+	for copied in (copy.copy(buffer), copy.deepcopy(buffer), pickle.loads(pickle.dumps(buffer))):
+		assert isinstance(copied, RingBuffer)
+		assert (list(copied), copied.maxlen, copied.dropped) == ([2, 3, 4], 3, 2)
+		copied.append(5)
+		assert list(copied) == [3, 4, 5]
+		assert list(buffer) == [2, 3, 4]
+	return
+
+def test_copy_keeps_the_window() -> None:
+	buffer: RingBuffer[int] = RingBuffer(window=2, key=lambda i: i)
+	for i in range(4): buffer.append(i)
+	copied = copy.copy(buffer)
+	copied.append(9)
+	assert list(copied) == [9]
+	assert list(buffer) == [1, 2, 3]
+	return
@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Any, TypeAlias, cast, final
+from collections import deque
+from threading import Condition, RLock, Thread
+from time import perf_counter_ns
+from typing import Any, Final, Literal, TypeAlias, cast, final
 
 from rt_bi_commons.Base.RtBiNode import RtBiNode
 from rt_bi_commons.Shared.MinQueue import MinQueue
+from rt_bi_commons.Shared.PackedRegularSet import PackedPolygon, PackedRegularSet
 from rt_bi_commons.Shared.Predicates import Predicates
+from rt_bi_commons.Shared.RingBuffer import RingBuffer
 from rt_bi_commons.Utils import Ros
 from rt_bi_commons.Utils.Msgs import Msgs
 from rt_bi_commons.Utils.RViz import RViz
@@ -12,10 +17,10 @@ from rt_bi_core.Spatial.Polygon import PolygonFactoryKeys
 from rt_bi_core.Spatial.Tracklet import Tracklet
 
 SubscriberPolygon: TypeAlias = MapPolygon | SensingPolygon | TargetPolygon
+RegionUpdate: TypeAlias = Msgs.RtBi.RegularSet | PackedRegularSet
+IngestPolicy: TypeAlias = Literal["block", "drop_oldest", "coalesce"]
+RetentionPolicy: TypeAlias = Literal["all", "latest", "last_n", "time_window"]
 
-# TODO: Optimization -- History keeps all of the updates.
-# Fix it if memory usage is high?
-# Maybe remove a polygon (except for the last) once it is processed.
 class RegionsSubscriber(RtBiNode, ABC):
 	"""
 	This Node provides an API to listen to all the messages about polygonal regions.
@@ -23,19 +28,59 @@ class RegionsSubscriber(RtBiNode, ABC):
 
 	**NOTICE**
 	* Subclasses of this class must subscribe to the relevant topics and
-		assign :meth:`~RegionSubscriber.subscriptionListener` to handle the messages.
+		assign :meth:`~RegionSubscriber.enqueueUpdate` or :meth:`~RegionSubscriber.enqueuePackedUpdate` to handle the messages.
 	* Subclasses do not need to create a publisher to RViz. Just call :meth:`~RegionsSubscriber.render`
+	* With a positive `ingestCapacity`, subscription callbacks only buffer the updates,
+		and a dedicated worker thread processes them. When the buffer is full, `ingestPolicy` decides:
+		`block` waits for room, `drop_oldest` drops the oldest buffered update of the region (or the oldest one),
+		and `coalesce` merges the update with the buffered one of the region (or waits for room).
+		Updates with tracklets that entered or exited are never dropped.
+	* With a positive `coalesceWindowSecs`, the due updates of a region whose stamps are within the window
+		are merged into the latest of them before processing, see :meth:`~RegionsSubscriber.__mergeUpdates`.
+	* The history of each region is bounded by `regionRetention`: `all` keeps every polygon, `latest` only the last one,
+		`last_n` the last `regionHistoryLength`, and `time_window` the ones within `regionHistorySecs` of the last one.
 	"""
+	INGEST_POLICIES: Final[tuple[IngestPolicy, ...]] = ("block", "drop_oldest", "coalesce")
+	RETENTION_POLICIES: Final[tuple[RetentionPolicy, ...]] = ("all", "latest", "last_n", "time_window")
 	def __init__(self, **kwArgs):
 		super().__init__(**kwArgs)
-		self.__msgPq: MinQueue[Msgs.RtBi.RegularSet] = MinQueue(key=self.__eventPqKey)
-		self.__processingTimer: Ros.Timer | None = None
-		self.mapRegions: dict[str, list[MapPolygon]] = {}
-		self.sensorRegions: dict[str, list[SensingPolygon]] = {}
-		self.targetRegions: dict[str, list[TargetPolygon]] = {}
+		self.declare_parameter("ingestCapacity", 0)
+		self.declare_parameter("ingestPolicy", "block")
+		self.declare_parameter("coalesceWindowSecs", 0.0)
+		self.declare_parameter("regionRetention", "all")
+		self.declare_parameter("regionHistoryLength", 10)
+		self.declare_parameter("regionHistorySecs", 10.0)
+		self.__retention = cast(RetentionPolicy, self.get_parameter("regionRetention").get_parameter_value().string_value)
+		assert self.__retention in RegionsSubscriber.RETENTION_POLICIES, f"Unknown retention policy {self.__retention}, expected one of {RegionsSubscriber.RETENTION_POLICIES}."
+		self.__historyLength: int = max(1, self.get_parameter("regionHistoryLength").get_parameter_value().integer_value)
+		self.__historyNs = int(max(0.0, self.get_parameter("regionHistorySecs").get_parameter_value().double_value) * 1e9)
+		self.__ingestCapacity: int = max(0, self.get_parameter("ingestCapacity").get_parameter_value().integer_value)
+		self.__ingestPolicy = cast(IngestPolicy, self.get_parameter("ingestPolicy").get_parameter_value().string_value)
+		self.__coalesceWindowNs = int(max(0.0, self.get_parameter("coalesceWindowSecs").get_parameter_value().double_value) * 1e9)
+		assert self.__ingestPolicy in RegionsSubscriber.INGEST_POLICIES, f"Unknown ingest policy {self.__ingestPolicy}, expected one of {RegionsSubscriber.INGEST_POLICIES}."
+		self.__ingest: deque[RegionUpdate] = deque()
+		"""Updates received but not yet queued for processing. Guarded by `__ingestCondition`."""
+		self.__ingestCondition = Condition()
+		self.__ingestStopping = False
+		"""Set when the node is destroyed, the ingest worker returns once the buffer is drained. Guarded by `__ingestCondition`."""
+		self.__ingestWorkerThread: Thread | None = None
+		self.__arrivals: dict[int, int] = {}
+		"""The arrival time of each update that is not processed yet, by the `id` of its message."""
+		self.__msgPq: MinQueue[RegionUpdate] = MinQueue(key=self.__eventPqKey)
+		self.__processingTimer: Ros.Timer = self.create_timer(1.0, self.__processEnqueuedUpdates, self.processingGroup)
+		"""Fires once when the earliest future update is due, it is disarmed otherwise."""
+		self.__processingTimer.cancel()
+		self.__regionsLock = RLock()
+		"""Guards the queue and the regions, which are shared by the ingest, processing and render callback groups."""
+		self.mapRegions: dict[str, RingBuffer[MapPolygon]] = {}
+		self.sensorRegions: dict[str, RingBuffer[SensingPolygon]] = {}
+		self.targetRegions: dict[str, RingBuffer[TargetPolygon]] = {}
 		(self.__rvizPublisher, _) = RViz.createRVizPublisher(self, Ros.CreateTopicName("map"))
+		if self.__ingestCapacity > 0:
+			self.__ingestWorkerThread = Thread(target=self.__ingestWorker, name=f"{self.get_name()}_ingest", daemon=True)
+			self.__ingestWorkerThread.start()
 
-	def __eventPqKey(self, val: Msgs.RtBi.RegularSet) -> int:
+	def __eventPqKey(self, val: RegionUpdate) -> int:
 		nanoSecs = Msgs.toNanoSecs(val.stamp)
 		if nanoSecs == 0: raise AssertionError("Update with no timestamp: ")
 		return nanoSecs
@@ -50,29 +95,50 @@ class RegionsSubscriber(RtBiNode, ABC):
 		else: raise RuntimeError("This should never happen") # No update goes missing
 		return
 
+	def __createHistory(self) -> RingBuffer:
+		match self.__retention:
+			case "latest": return RingBuffer(capacity=1)
+			case "last_n": return RingBuffer(capacity=self.__historyLength)
+			case "time_window": return RingBuffer(window=self.__historyNs, key=lambda poly: poly.timeNanoSecs)
+			case _: return RingBuffer()
+
+	@property
+	def historyStats(self) -> dict[str, int]:
+		"""The number of regions, and of the polygons retained and dropped, across the histories of all regions."""
+		histories = [*self.mapRegions.values(), *self.sensorRegions.values(), *self.targetRegions.values()]
+		return {
+			"regions": len(histories),
+			"retained": sum(len(history) for history in histories),
+			"dropped": sum(history.dropped for history in histories),
+		}
+
 	def __storeGeometry(self, setId: str, poly: SubscriberPolygon) -> None:
 		match poly.type:
 			case StaticPolygon.type | AffinePolygon.type | DynamicPolygon.type:
 				poly = cast(MapPolygon, poly)
 				if setId not in self.mapRegions:
-					self.mapRegions[setId] = []
+					self.mapRegions[setId] = self.__createHistory()
 				self.mapRegions[setId].append(poly)
 			case SensingPolygon.type:
 				poly = cast(SensingPolygon, poly)
 				if setId not in self.sensorRegions:
-					self.sensorRegions[setId] = []
+					self.sensorRegions[setId] = self.__createHistory()
 				self.sensorRegions[setId].append(poly)
 			case TargetPolygon.type:
 				poly = cast(TargetPolygon, poly)
 				if setId not in self.targetRegions:
-					self.targetRegions[setId] = []
+					self.targetRegions[setId] = self.__createHistory()
 				self.targetRegions[setId].append(poly)
 			case _:
 				raise RuntimeError(f"Unexpected region type: {poly.type}")
 		self.__notifySubclasses(poly)
 		return
 
-	def __useLatestGeometry(self, regularSet: Msgs.RtBi.RegularSet) -> None:
+	def __predicatesOf(self, regularSet: RegionUpdate) -> Predicates:
+		if isinstance(regularSet, PackedRegularSet): return Predicates(regularSet.predicates)
+		return Predicates.fromMsgArray(regularSet.predicates) if isinstance(regularSet.predicates, list) else Predicates()
+
+	def __useLatestGeometry(self, regularSet: RegionUpdate) -> None:
 		polys: list[SubscriberPolygon] | None = None # For majority of the cases this is a list with a single poly, except for when initializing temporal events
 		match regularSet.set_type:
 			case StaticPolygon.type.value:
@@ -99,7 +165,7 @@ class RegionsSubscriber(RtBiNode, ABC):
 			raise RuntimeError(f"No polygon stored for id: {regularSet.id}, set type: {regularSet.set_type}.")
 
 		for poly in polys:
-			predicates = Predicates.fromMsgArray(regularSet.predicates) if isinstance(regularSet.predicates, list) else Predicates()
+			predicates = self.__predicatesOf(regularSet)
 			kwArgs: dict[PolygonFactoryKeys, Any] = {
 				"polygonId": poly.id.polygonId,
 				"regionId": poly.id.regionId,
@@ -115,8 +181,21 @@ class RegionsSubscriber(RtBiNode, ABC):
 			self.__storeGeometry(poly.id.regionId, poly)
 		return
 
-	def __createTracklets(self, regularSet: Msgs.RtBi.RegularSet) -> dict[str, Tracklet]:
+	def __createTracklets(self, regularSet: RegionUpdate) -> dict[str, Tracklet]:
 		tracklets = {}
+		if isinstance(regularSet, PackedRegularSet):
+			for packed in regularSet.estimations:
+				tracklets[packed.id] = Tracklet(
+					idStr=packed.id,
+					timeNanoSecs=regularSet.stamp,
+					hIndex=-1,
+					x=packed.x,
+					y=packed.y,
+					angleFromX=packed.angleFromX,
+					entered=packed.entered,
+					exited=packed.exited,
+				)
+			return tracklets
 		for i in range(len(regularSet.estimations)):
 			trackletMsg = Ros.GetMessage(regularSet.estimations, i, Msgs.RtBi.Tracklet)
 			tracklet = Tracklet(
@@ -132,17 +211,18 @@ class RegionsSubscriber(RtBiNode, ABC):
 			tracklets[trackletMsg.id] = tracklet
 		return tracklets
 
-	def __createGeometry(self, regularSet: Msgs.RtBi.RegularSet, polyMsg: Msgs.RtBi.Polygon) -> None:
-		predicates = Predicates.fromMsgArray(regularSet.predicates) if isinstance(regularSet.predicates, list) else Predicates()
+	def __createGeometry(self, regularSet: RegionUpdate, polyMsg: Msgs.RtBi.Polygon | PackedPolygon) -> None:
+		predicates = self.__predicatesOf(regularSet)
+		packed = isinstance(polyMsg, PackedPolygon)
 		kwArgs: dict[PolygonFactoryKeys, Any] = {
 			"polygonId": polyMsg.id,
 			"regionId": regularSet.id,
 			"subPartId": "",
-			"envelope": Msgs.toCoordsList(polyMsg.region.points),
+			"envelope": polyMsg.coords if packed else Msgs.toCoordsArray(polyMsg.region.points),
 			"timeNanoSecs": Msgs.toNanoSecs(regularSet.stamp),
 			"predicates": predicates,
 			"hIndex": -1,
-			"centerOfRotation": Msgs.toCoords(polyMsg.center_of_rotation),
+			"centerOfRotation": polyMsg.centerOfRotation if packed else Msgs.toCoords(polyMsg.center_of_rotation),
 		}
 		match regularSet.set_type:
 			case Msgs.RtBi.RegularSet.STATIC:
@@ -163,42 +243,171 @@ class RegionsSubscriber(RtBiNode, ABC):
 		return
 
 	def __processEnqueuedUpdates(self) -> None:
-		if self.__processingTimer is not None: self.__processingTimer.destroy()
+		with self.__regionsLock: return self.__processEnqueuedUpdatesLocked()
+
+	def __processEnqueuedUpdatesLocked(self) -> None:
+		self.__processingTimer.cancel()
 		if not self.__msgPq.isEmpty: self.log(f"** Processing enqueued updates. Queue Size = {len(self.__msgPq)}")
 		nowNanoSecs = Msgs.toNanoSecs(self.get_clock().now())
-		timerInterval = 1000
-		while not self.__msgPq.isEmpty:
-			nextTimeStamp = Msgs.toNanoSecs(self.__msgPq.peek.stamp)
-			if nowNanoSecs < nextTimeStamp:
-				delta = nextTimeStamp - nowNanoSecs
-				timerInterval = delta if delta < timerInterval else timerInterval
-				break
-			regularSet = self.__msgPq.dequeue()
-			if len(regularSet.polygons) == 0:
-				self.__useLatestGeometry(regularSet)
-				continue
-			for polyMsg in regularSet.polygons:
-				self.__createGeometry(regularSet, polyMsg)
+		due: list[RegionUpdate] = []
+		while not self.__msgPq.isEmpty and Msgs.toNanoSecs(self.__msgPq.peek.stamp) <= nowNanoSecs:
+			due.append(self.__msgPq.dequeue())
+		if self.__coalesceWindowNs > 0 and len(due) > 1: due = self.__coalesce(due)
+		for regularSet in due: self.__processUpdate(regularSet)
 		if self.__msgPq.isEmpty:
 			self.log(f"** Processing finished -- EXHAUSTED the event queue.")
+			return
+		nextTimeStamp = Msgs.toNanoSecs(self.__msgPq.peek.stamp)
+		delayNanoSecs = max(1, nextTimeStamp - Msgs.toNanoSecs(self.get_clock().now()))
+		self.log(f"** Processing finished. Queue Size = {len(self.__msgPq)}, History = {self.historyStats}")
+		self.log(f"Next event is in the future @ {repr(nextTimeStamp)} -- timer armed for {delayNanoSecs}ns.")
+		self.__processingTimer.timer_period_ns = delayNanoSecs
+		self.__processingTimer.reset()
+		return
+
+	def __coalesce(self, due: list[RegionUpdate]) -> list[RegionUpdate]:
+		"""Groups the updates of each region, each group spans at most `coalesceWindowSecs` from its first update."""
+		openGroups: dict[tuple[str, str, bool], list[RegionUpdate]] = {}
+		groups: list[list[RegionUpdate]] = []
+		for regularSet in due:
+			key = (regularSet.id, regularSet.set_type, isinstance(regularSet, PackedRegularSet))
+			group = openGroups.get(key, None)
+			if group is None or self.__eventPqKey(regularSet) - self.__eventPqKey(group[0]) > self.__coalesceWindowNs:
+				group = []
+				openGroups[key] = group
+				groups.append(group)
+			group.append(regularSet)
+		if len(groups) == len(due): return due
+		self.log(f"Coalesced {len(due)} updates into {len(groups)}.")
+		return sorted((self.__mergeUpdates(group) for group in groups), key=self.__eventPqKey)
+
+	def __mergeUpdates(self, group: list[RegionUpdate]) -> RegionUpdate:
+		"""
+		Merges the updates of a region into the latest one.
+		It keeps the latest geometry and predicate values, and the tracklets of the latest update.
+		The tracklets of earlier updates are kept only if they entered or exited, and flags of a tracklet are combined.
+		"""
+		latest = group[-1]
+		if len(group) == 1: return latest
+		arrivals = [self.__arrivals.pop(id(regularSet)) for regularSet in group if id(regularSet) in self.__arrivals]
+		if len(arrivals) > 0: self.__arrivals[id(latest)] = min(arrivals)
+		if len(latest.polygons) == 0:
+			latest.polygons = next((regularSet.polygons for regularSet in reversed(group) if len(regularSet.polygons) > 0), latest.polygons)
+		predicates: dict[str, Any] = {}
+		tracklets: dict[str, Any] = {}
+		for regularSet in group:
+			if isinstance(regularSet, PackedRegularSet): predicates.update(regularSet.predicates)
+			else:
+				for predicate in regularSet.predicates: predicates[predicate.name] = predicate
+			for tracklet in regularSet.estimations:
+				if tracklet.id in tracklets:
+					tracklet.entered = tracklet.entered or tracklets[tracklet.id].entered
+					tracklet.exited = tracklet.exited or tracklets[tracklet.id].exited
+				tracklets[tracklet.id] = tracklet
+		latestIds = {tracklet.id for tracklet in latest.estimations}
+		latest.predicates = Predicates(predicates) if isinstance(latest, PackedRegularSet) else list(predicates.values())
+		latest.estimations = [t for t in tracklets.values() if t.id in latestIds or t.entered or t.exited]
+		return latest
+
+	def __processUpdate(self, regularSet: RegionUpdate) -> None:
+		startNs = perf_counter_ns()
+		depth = len(self.__ingest) + len(self.__msgPq)
+		if len(regularSet.polygons) == 0:
+			self.__useLatestGeometry(regularSet)
 		else:
-			self.log(f"** Processing finished. Queue Size = {len(self.__msgPq)}")
-			self.log(f"Next event is in the future @ {repr(nextTimeStamp)} -- timer started for {timerInterval}ns.")
-		self.__processingTimer = Ros.CreateTimer(self, self.__processEnqueuedUpdates, timerInterval)
+			for polyMsg in regularSet.polygons:
+				self.__createGeometry(regularSet, polyMsg)
+		endNs = perf_counter_ns()
+		queuedNs = startNs - self.__arrivals.pop(id(regularSet), startNs)
+		if self.isProfiling: Ros.RecordIngestStats(Msgs.toNanoSecs(self.get_clock().now()), depth, queuedNs, endNs - startNs)
 		return
 
+	def __carriesEvents(self, regularSet: RegionUpdate) -> bool:
+		return any(tracklet.entered or tracklet.exited for tracklet in regularSet.estimations)
+
+	def __makeRoom(self, regularSet: RegionUpdate) -> RegionUpdate:
+		"""
+		Applies the ingest policy to the full buffer, and returns the update to buffer. The caller holds `__ingestCondition`.
+		Updates with tracklets that entered or exited are never dropped, as the events would be lost with them.
+		"""
+		if self.__ingestPolicy == "drop_oldest":
+			candidates = [i for (i, buffered) in enumerate(self.__ingest) if not self.__carriesEvents(buffered)]
+			sameRegion = [i for i in candidates if self.__ingest[i].id == regularSet.id]
+			i = sameRegion[0] if len(sameRegion) > 0 else candidates[0] if len(candidates) > 0 else -1
+			if i > -1:
+				self.log(f"Ingest buffer is full, dropping an update of {self.__ingest[i].id} by policy {self.__ingestPolicy}.")
+				self.__arrivals.pop(id(self.__ingest[i]), None)
+				del self.__ingest[i]
+				return regularSet
+		elif self.__ingestPolicy == "coalesce":
+			packed = isinstance(regularSet, PackedRegularSet)
+			i = next((
+				i for (i, buffered) in enumerate(self.__ingest)
+				if buffered.id == regularSet.id and buffered.set_type == regularSet.set_type and isinstance(buffered, PackedRegularSet) == packed
+			), -1)
+			if i > -1:
+				self.log(f"Ingest buffer is full, merging an update of {regularSet.id} by policy {self.__ingestPolicy}.")
+				buffered = self.__ingest[i]
+				del self.__ingest[i]
+				return self.__mergeUpdates(sorted([buffered, regularSet], key=self.__eventPqKey))
+		self.__ingestCondition.wait_for(lambda: len(self.__ingest) < self.__ingestCapacity)
+		return regularSet
+
+	def __ingestWorker(self) -> None:
+		while True:
+			with self.__ingestCondition:
+				self.__ingestCondition.wait_for(lambda: len(self.__ingest) > 0 or self.__ingestStopping)
+				if len(self.__ingest) == 0: return
+				batch = list(self.__ingest)
+				self.__ingest.clear()
+				self.__ingestCondition.notify_all()
+			try:
+				with self.__regionsLock:
+					for regularSet in batch: self.__msgPq.enqueue(regularSet)
+					self.__processEnqueuedUpdatesLocked()
+			except Exception as e:
+				Ros.Log(f"Processing updates failed in {self.get_fully_qualified_name()}: {e}", severity=Ros.LoggingSeverity.ERROR)
+
 	@final
 	def enqueueUpdate(self, setArr: Msgs.RtBi.RegularSetArray) -> None:
 		"""Enqueues the update. Subclasses must call this function upon subscription message."""
 		if len(setArr.sets) == 0: return
 		setArr.sets = Ros.AsList(setArr.sets, Msgs.RtBi.RegularSet)
-		self.log(f"{len(setArr.sets)} updates arrived.")
-		for match in setArr.sets:
-			self.log(f"Recording update of type {match.set_type} in event pQ @{Msgs.toNanoSecs(match.stamp)}.")
-			self.__msgPq.enqueue(match)
-		self.__processEnqueuedUpdates()
+		return self.__enqueueSets(setArr.sets)
+
+	@final
+	def enqueuePackedUpdate(self, msg: Msgs.RtBi.PackedRegularSetArray) -> None:
+		"""The counterpart of :meth:`enqueueUpdate` for packed messages."""
+		if len(msg.set_types) == 0: return
+		return self.__enqueueSets(PackedRegularSet.fromMsg(msg))
+
+	def __enqueueSets(self, sets: list[Msgs.RtBi.RegularSet] | list[PackedRegularSet]) -> None:
+		self.log(f"{len(sets)} updates arrived.")
+		if self.__ingestCapacity > 0:
+			with self.__ingestCondition:
+				for match in sets:
+					self.__arrivals[id(match)] = perf_counter_ns()
+					if len(self.__ingest) >= self.__ingestCapacity: match = self.__makeRoom(match)
+					self.__ingest.append(match)
+				self.__ingestCondition.notify_all()
+			return
+		with self.__regionsLock:
+			for match in sets:
+				self.log(f"Recording update of type {match.set_type} in event pQ @{Msgs.toNanoSecs(match.stamp)}.")
+				self.__arrivals[id(match)] = perf_counter_ns()
+				self.__msgPq.enqueue(match)
+			self.__processEnqueuedUpdatesLocked()
 		return
 
+	def destroy_node(self) -> None:
+		with self.__ingestCondition:
+			self.__ingestStopping = True
+			self.__ingestCondition.notify_all()
+		if self.__ingestWorkerThread is not None: self.__ingestWorkerThread.join()
+		# Every update was processed and recorded once the worker returned.
+		Ros.LogIngestStats()
+		return super().destroy_node()
+
 	def declareParameters(self) -> None:
 		return
 
@@ -214,7 +423,7 @@ class RegionsSubscriber(RtBiNode, ABC):
 			self.log(f"{self.get_fully_qualified_name()} skipping render... RViz is not ready yet to receive messages.")
 			return
 		msg = RViz.Msgs.MarkerArray()
-		markers = self.createMarkers()
+		with self.__regionsLock: markers = self.createMarkers()
 		if len(markers) == 0: return
 		msg.markers = markers
 		self.__rvizPublisher.publish(msg)
@@ -1,5 +1,7 @@
 from abc import ABC
 
+import numpy as np
+
 from rt_bi_commons.Shared.Color import RGBA
 from rt_bi_commons.Shared.Pose import Coords, CoordsList
 from rt_bi_commons.Shared.Predicates import Predicates
@@ -13,7 +15,7 @@ class AffinePolygonBase(Polygon, ABC):
 			polygonId: str,
 			regionId: str,
 			subPartId: str,
-			envelope: CoordsList,
+			envelope: CoordsList | np.ndarray,
 			predicates: Predicates,
 			envelopeColor: RGBA,
 			centerOfRotation: Coords,
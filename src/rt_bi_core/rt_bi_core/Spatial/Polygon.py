@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 from enum import Enum
 from typing import Literal
 
+import numpy as np
+
 from rt_bi_commons.Shared.Color import RGBA, ColorNames, ColorUtils
 from rt_bi_commons.Shared.NodeId import NodeId
 from rt_bi_commons.Shared.Predicates import Predicates
@@ -58,7 +60,7 @@ class Polygon(ABC):
 			polygonId: str,
 			regionId: str,
 			subPartId: str,
-			envelope: GeometryLib.CoordsList,
+			envelope: GeometryLib.CoordsList | np.ndarray,
 			envelopeColor: RGBA,
 			predicates: Predicates,
 			timeNanoSecs: int,
@@ -71,7 +73,8 @@ class Polygon(ABC):
 		"""
 		:param str polygonId: Id of the polygon.
 		:param str regionId: Id of the regular region owning this polygon.
-		:param CoordsList envelope: The list of the coordinates of the vertices of the envelope of the polygonal region.
+		:param envelope: The coordinates of the vertices of the envelope of the polygonal region.
+		:type envelope: `CoordsList` or an `(n, 2)` `np.ndarray`, which is used without conversion.
 		:param RGBA envelopeColor: The color of the envelope when/if rendered.
 		:param predicates: The predicates associated with this polygon, defaults to ``[]``.
 		:type predicates: `list[Msgs.RtBi.Predicate]` or `Predicates`
@@ -91,25 +94,23 @@ class Polygon(ABC):
 		self.__RENDER_LINE_WIDTH = renderLineWidth
 		self.__interiorPolygon = Shapely.Polygon(envelope) if interior is None else interior
 		self.__interiorPolygon = Shapely.set_precision(self.__interiorPolygon, GeometryLib.EPSILON)
-		self.__envelope = GeometryLib.getGeometryCoords(self.__interiorPolygon) if len(envelope) == 0 else envelope
+		self.__envelope: GeometryLib.CoordsList | np.ndarray = GeometryLib.getGeometryCoords(self.__interiorPolygon) if len(envelope) == 0 else envelope
 		self.__DEFAULT_ENVELOPE_COLOR = envelopeColor
 		self.__INTERIOR_COLOR = interiorColor
 		self.__TEXT_COLOR = ColorNames.BLACK if ColorUtils.isLightColor(interiorColor) else ColorNames.WHITE
 		self.__predicates = predicates
 		if len(kwArgs) > 0 : Ros.Log(f"Unassigned keyword args ignored: {repr(kwArgs)}")
-		self.__edges: list[Shapely.LineString] = []
-		self.__buildEdges()
+		self.__edges: list[Shapely.LineString] | None = None
+		"""Built on first use, see :attr:`edges`."""
 
 	def __repr__(self) -> str:
 		accState = "O" if self.isAccessible else "|"
 		return f"{self.shortName}[{accState}]"
 
-	def __buildEdges(self) -> None:
-		verts = GeometryLib.getGeometryCoords(self.interior)
-		for v1, v2 in zip(verts, verts[1:]):
-			edgeCoords = [v1, v2]
-			self.__edges.append(Shapely.LineString(edgeCoords))
-		return
+	def __buildEdges(self) -> list[Shapely.LineString]:
+		verts = np.asarray(GeometryLib.getGeometryCoords(self.interior), dtype=np.float64)
+		if len(verts) < 2: return []
+		return list(Shapely.linestrings(np.stack((verts[:-1], verts[1:]), axis=1)))
 
 	@property
 	def timeNanoSecs(self) -> int:
@@ -150,6 +151,7 @@ class Polygon(ABC):
 	@property
 	def envelope(self) -> GeometryLib.CoordsList:
 		"""The list of the coordinates of the vertices ."""
+		if isinstance(self.__envelope, np.ndarray): self.__envelope = [(x, y) for (x, y) in self.__envelope.tolist()]
 		return self.__envelope
 
 	@property
@@ -214,6 +216,7 @@ class Polygon(ABC):
 		A dictionary of edge identifier to `Shapely.LineString`.
 		The edge identifier is a string.
 		"""
+		if self.__edges is None: self.__edges = self.__buildEdges()
 		return self.__edges
 
 	def intersects(self, other: "Polygon") -> bool:
@@ -1,5 +1,6 @@
 from typing import Literal
 
+from rt_bi_commons.Shared.PackedRegularSet import PackedRegularSet
 from rt_bi_commons.Utils import Ros
 from rt_bi_commons.Utils.Geometry import GeometryLib
 from rt_bi_commons.Utils.Msgs import Msgs
@@ -16,7 +17,10 @@ class SensorEmulator(AffineRegionEmulator[SensingPolygon], RegionsSubscriber):
 		newKw = { "node_name": "emulator_sensor", "loggingSeverity": Ros.LoggingSeverity.INFO }
 		super().__init__(SensingPolygon, **newKw)
 		self.__observedTargets: dict[str, Literal["entered", "exited", "stayed"]] = {}
-		(self.__locationPublisher, _) = RtBiInterfaces.createSensorPublisher(self, self.__publishUpdateNow, self.updateInterval)
+		self.declare_parameter("packed", False)
+		self.__packed = self.get_parameter("packed").get_parameter_value().bool_value
+		if self.__packed: (self.__locationPublisher, _) = RtBiInterfaces.createPackedSensorPublisher(self, self.__publishUpdateNow, self.updateInterval)
+		else: (self.__locationPublisher, _) = RtBiInterfaces.createSensorPublisher(self, self.__publishUpdateNow, self.updateInterval)
 		RtBiInterfaces.subscribeToTargets(self, self.enqueueUpdate)
 
 	def __emulateEstimation(self, sensor: SensingPolygon, target: TargetPolygon) -> None:
@@ -45,6 +49,7 @@ class SensorEmulator(AffineRegionEmulator[SensingPolygon], RegionsSubscriber):
 			if entered: self.__observedTargets[targetId] = "stayed"
 			# Now that we published targets, remove the ones who exited
 			if exited: self.__observedTargets.pop(targetId, None)
+		if self.__packed: return Ros.Publish(self.__locationPublisher, PackedRegularSet.toMsg([updateMsg]))
 		arr = Msgs.RtBi.RegularSetArray()
 		arr.sets = [updateMsg]
 		Ros.Publish(self.__locationPublisher, arr)
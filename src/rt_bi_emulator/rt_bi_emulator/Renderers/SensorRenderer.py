@@ -10,6 +10,7 @@ class SensorRenderer(RegionsSubscriber):
 		newKw = { "node_name": "renderer_sensor", "loggingSeverity": Ros.LoggingSeverity.INFO, **kwArgs}
 		super().__init__(**newKw)
 		RtBiInterfaces.subscribeToSensors(self, self.enqueueUpdate)
+		RtBiInterfaces.subscribeToPackedSensors(self, self.enqueuePackedUpdate)
 
 	def onSensorUpdated(self, _) -> None:
 		self.log("Sensors updated.")
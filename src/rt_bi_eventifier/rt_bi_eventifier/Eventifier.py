@@ -10,6 +10,7 @@ from rt_bi_commons.Utils.RViz import RViz
 from rt_bi_core.RegionsSubscriber import RegionsSubscriber
 from rt_bi_core.Spatial import MapPolygon
 from rt_bi_core.Spatial.SensingPolygon import SensingPolygon
+from rt_bi_eventifier.Model.ConnectivityGraph import ConnectivityGraph
 from rt_bi_eventifier.Model.MetricIGraph import MetricIGraph
 
 
@@ -20,6 +21,9 @@ class Eventifier(ColdStartable, RegionsSubscriber):
 		ColdStartable.__init__(self)
 		self.declareParameters()
 		self.__renderModules: list[MetricIGraph.SUBMODULE] = []
+		self.__compactIGraph = False
+		self.__keyframeInterval = 10
+		self.__intraProcess = False
 		self.parseParameters()
 		modulePublishers: dict[MetricIGraph.SUBMODULE, Ros.Publisher | None] = {}
 		for module in MetricIGraph.SUBMODULES:
@@ -28,8 +32,11 @@ class Eventifier(ColdStartable, RegionsSubscriber):
 			modulePublishers[module] = publisher
 
 		self.__iGraphPublisher = RtBiInterfaces.createIGraphPublisher(self)
+		self.__iGraphChannel = RtBiInterfaces.createInProcessIGraphChannel()
+		self.__iGraphSeq = 0
+		self.__sentLayers: dict[int, ConnectivityGraph] = {}
 		self.__isoPublisher = RtBiInterfaces.createIsomorphismPublisher(self)
-		self.__iGraph: MetricIGraph = MetricIGraph(modulePublishers)
+		self.__iGraph: MetricIGraph = MetricIGraph(modulePublishers, self.__compactIGraph)
 		RtBiInterfaces.subscribeToProjectiveMap(self, self.enqueueUpdate)
 		self.waitForColdStartPermission()
 		return
@@ -37,14 +44,18 @@ class Eventifier(ColdStartable, RegionsSubscriber):
 	def onColdStartAllowed(self, payload: ColdStartPayload) -> None:
 		RtBiInterfaces.subscribeToAffineMap(self, self.enqueueUpdate)
 		RtBiInterfaces.subscribeToSensors(self, self.enqueueUpdate)
+		RtBiInterfaces.subscribeToPackedSensors(self, self.enqueuePackedUpdate)
 		self.publishColdStartDone()
 		return
 
 	def __publishBaMsg(self, iGraph: MetricIGraph, isomorphism: dict[str, str] | None) -> None:
 		if isomorphism is None or len(isomorphism) == 0:
-			msg = Msgs.RtBi.IGraph()
-			msg.adjacency_json = iGraph.asStr()
-			Ros.Publish(self.__iGraphPublisher, msg)
+			keyframe = self.__iGraphSeq % self.__keyframeInterval == 0
+			delta = iGraph.topLayersDelta(self.__iGraphSeq, None if keyframe else self.__sentLayers)
+			self.__sentLayers = iGraph.topLayersWindow()
+			self.__iGraphSeq += 1
+			if self.__intraProcess: self.__iGraphChannel.publish(delta)
+			else: Ros.Publish(self.__iGraphPublisher, delta.toMsg())
 		else:
 			msg = Msgs.RtBi.Isomorphism()
 			msg.isomorphism_json = dumps(isomorphism)
@@ -73,6 +84,9 @@ class Eventifier(ColdStartable, RegionsSubscriber):
 	def declareParameters(self) -> None:
 		self.log(f"{self.get_fully_qualified_name()} is setting node parameters.")
 		self.declare_parameter("renderModules", Parameter.Type.STRING_ARRAY)
+		self.declare_parameter("compactIGraph", False)
+		self.declare_parameter("keyframeInterval", 10)
+		self.declare_parameter("intraProcess", False)
 		return
 
 	def parseParameters(self) -> None:
@@ -83,6 +97,9 @@ class Eventifier(ColdStartable, RegionsSubscriber):
 				self.__renderModules.append(module)
 			else:
 				self.log(f"Unknown module name in config file {module} for node {self.get_fully_qualified_name()}")
+		self.__compactIGraph = self.get_parameter("compactIGraph").get_parameter_value().bool_value
+		self.__keyframeInterval = max(1, self.get_parameter("keyframeInterval").get_parameter_value().integer_value)
+		self.__intraProcess = self.get_parameter("intraProcess").get_parameter_value().bool_value
 		return
 
 	def createMarkers(self) -> list[RViz.Msgs.Marker]:
@@ -1,8 +1,6 @@
 from dataclasses import dataclass
 from typing import Final, Sequence
 
-from networkx import relabel_nodes
-
 from rt_bi_commons.Shared.Color import ColorNames
 from rt_bi_commons.Shared.NodeId import NodeId
 from rt_bi_commons.Utils import Ros
@@ -18,7 +16,7 @@ from rt_bi_core.Spatial.Tracklet import Tracklet
 
 class ConnectivityGraph(NxUtils.Graph[GraphPolygon]):
 	""" The implementation of a Connectivity Graph in python as described in the dissertation. """
-	@dataclass(frozen=True)
+	@dataclass(frozen=True, slots=True)
 	class NodeData(NxUtils.NodeData[GraphPolygon]): ...
 
 	TRACKLET_EXIT_MAX_DISTANCE: Final[int] = 10
@@ -41,7 +39,6 @@ class ConnectivityGraph(NxUtils.Graph[GraphPolygon]):
 		self.__tracklet: Tracklet | None = None
 		self.__numberOfPolygonVerts = -1
 		Ros.Log(f"Constructing Connectivity Graph @ {self.timeNanoSecs}")
-		for poly in mapPolys + sensorPolys: poly.id.copy(hIndex=self.__hIndex)
 		self.__constructMap(polys=mapPolys)
 		self.__constructSensors(polys=sensorPolys)
 		self.__constructNodes()
@@ -224,6 +221,10 @@ class ConnectivityGraph(NxUtils.Graph[GraphPolygon]):
 
 	@property
 	def hIndex(self) -> int:
+		"""
+			The index of the I-graph layer that holds this graph.
+			Node ids and polygon ids are left untouched, they always have `hIndex = -1` in a CGraph.
+		"""
 		return self.__hIndex
 
 	@hIndex.setter
@@ -231,15 +232,6 @@ class ConnectivityGraph(NxUtils.Graph[GraphPolygon]):
 		assert value >= 0, f"hIndex must be non-negative. given value = {value}"
 		Ros.Log(f"Setting hIndex of {repr(self)} to {value}")
 		self.__hIndex = value
-		relabeledNodes = {}
-		for id_ in self.nodes:
-			poly = self.getContent(id_, "polygon")
-			poly.id = poly.id.copy(hIndex=value)
-			relabeledNodes[id_] = poly.id
-		# Ros.Log(f"Labels", [(k, relabeledNodes[k]) for k in relabeledNodes])
-		relabel_nodes(self, relabeledNodes, copy=False)
-		for poly in self.map + self.sensors + self.shadows + self.antiShadows:
-			poly.id = poly.id.copy(hIndex=value)
 		return
 
 	@property
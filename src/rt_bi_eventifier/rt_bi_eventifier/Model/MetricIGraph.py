@@ -1,12 +1,11 @@
 import copy
-from dataclasses import dataclass
-from json import dumps
-from typing import Any, Callable, Literal, cast
-
-from networkx import adjacency_data, subgraph_view
-from regex import F
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, Literal, cast
 
 from rt_bi_commons.Shared.Color import RGBA, ColorUtils
+from rt_bi_commons.Shared.IGraphDelta import IGraphDelta, LayerDelta
+from rt_bi_commons.Shared.Predicates import Predicates
 from rt_bi_commons.Utils import Ros
 from rt_bi_commons.Utils.Geometry import GeometryLib, Shapely
 from rt_bi_commons.Utils.NetworkX import NxUtils
@@ -35,35 +34,29 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 	__MAX_HISTORY = 15
 	__ISOMORPHIC_DISTANCE_LIMIT = 50
 
-	@dataclass(frozen=True, order=True)
-	class NodeData(NxUtils.NodeData[GraphPolygon]):
-		subset: int = -1
-		"""Used in multipartite layout.
-		https://networkx.org/documentation/stable/reference/generated/networkx.drawing.layout.multipartite_layout.html
+	def __init__(self, rvizPublishers: dict[SUBMODULE, Ros.Publisher | None] | None = None, compact = False):
+		"""
+			Initialize the I-graph.
+			When `compact` is set, the nodes and edges are kept in a :class:`NxUtils.CompactGraph`
+			and a networkx graph is only built for rendering and for :meth:`topLayers`.
 		"""
-
-		@staticmethod
-		def extend(data: NxUtils.NodeData[GraphPolygon], subset: int) -> "MetricIGraph.NodeData":
-			return MetricIGraph.NodeData(
-				polygon=data.polygon,
-				subset=subset
-			)
-
-	def __init__(self, rvizPublishers: dict[SUBMODULE, Ros.Publisher | None] | None = None):
-		"""Initialize the I-graph."""
 		rvizPublisher = None if rvizPublishers is None else rvizPublishers.pop("i_graph", None)
 		super().__init__(rVizPublisher=rvizPublisher)
+		self.__compact: NxUtils.CompactGraph[GraphPolygon] | None = NxUtils.CompactGraph() if compact else None
 		# super().__init__(rVizPublisher=None)
-		self.__history: list[ConnectivityGraph] = []
+		self.__history: deque[ConnectivityGraph] = deque(maxlen=self.__MAX_HISTORY)
+		self.__layers: deque[set[NxUtils.Id]] = deque(maxlen=self.__MAX_HISTORY)
+		"""The ids of the I-graph nodes in each layer, parallel to `history`."""
 		self.__nodeMapping = {}
 
 		self.componentEvents: list[list[Shapely.Polygon]] = []
 		""" The reason this is a list of lists is that the time of event is relative to the time between. """
 		self.__rvizPublishers = rvizPublishers if rvizPublishers is not None else {}
 		self.__ctrs: dict[AffinePolygon.Id, ContinuousTimePolygon[GraphPolygon]] = {}
+		self.__sweptCache: tuple[ConnectivityGraph, ConnectivityGraph, Shapely.AnyObj | None] | None = None
 
 	@property
-	def history(self) -> list[ConnectivityGraph]:
+	def history(self) -> deque[ConnectivityGraph]:
 		return self.__history
 
 	@property
@@ -95,36 +88,71 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 			timeRangeStr = "%d" % self.history[0].timeNanoSecs
 		if self.depth > 1:
 			timeRangeStr = "%d , %d" % (self.history[0].timeNanoSecs, self.history[-1].timeNanoSecs)
-		return f"IGr-[{timeRangeStr})(D={self.depth}, N={len(self.nodes)}, E={len(self.edges)})"
+		if self.__compact is not None: (n, e) = (len(self.__compact), self.__compact.numberOfEdges)
+		else: (n, e) = (len(self.nodes), len(self.edges))
+		return f"IGr-[{timeRangeStr})(D={self.depth}, N={n}, E={e})"
 
 	def topLayers(self, depth = 2) -> "MetricIGraph":
-		# self.hIndex - 1 is because the value of hIndex is one more than the last assigned hIndex.
-		hIndex = 0 if self.depth == 0 else cast(int, self.history[-1].hIndex)
-		filterFn = lambda n: cast(NxUtils.Id, n).hIndex > (hIndex - depth)
-		g = cast(MetricIGraph, subgraph_view(self, filter_node=filterFn))
+		if self.__compact is not None:
+			hIndices = [cast(int, graph.hIndex) for graph in islice(reversed(self.history), depth)]
+			return self.__compact.toNx(MetricIGraph({ "i_graph": self.rVizPublisher }), hIndices)
+		nodes: set[NxUtils.Id] = set().union(*islice(reversed(self.__layers), depth))
+		g = cast(MetricIGraph, self.subgraph(nodes))
 		return g
 
-	def asStr(self, depth = 2) -> str:
-		g = self.topLayers(depth)
-		jsonDict = adjacency_data(g)
-		for node in jsonDict["nodes"]:
-			node = cast(dict[str, Any], node)
-			node["predicates"] = cast(GraphPolygon, node["polygon"]).predicates
-			node.pop("polygon")
-			node.pop("subset")
-		return dumps(jsonDict, default=vars)
+	def topLayersWindow(self, depth = 2) -> dict[int, ConnectivityGraph]:
+		"""The top `depth` layers keyed by their hIndex."""
+		return { cast(int, graph.hIndex): graph for graph in islice(reversed(self.history), depth) }
+
+	def topLayersDelta(self, seq: int, since: dict[int, ConnectivityGraph] | None, depth = 2) -> IGraphDelta:
+		"""
+			The changes to the top `depth` layers since they were `since`, as given by :meth:`topLayersWindow`.
+			If `since` is `None`, the returned delta is a keyframe carrying all of the top layers.
+		"""
+		window = self.topLayersWindow(depth)
+		removed: list[int] = []
+		if since is not None:
+			for hIndex in since:
+				if window.get(hIndex, None) is not since[hIndex]: removed.append(hIndex)
+		added: list[LayerDelta] = []
+		for index in range(self.depth - len(window), self.depth):
+			graph = self.history[index]
+			if since is not None and since.get(cast(int, graph.hIndex), None) is graph: continue
+			added.append(self.__layerDelta(index, window))
+		return IGraphDelta(seq=seq, keyframe=since is None, removed=tuple(removed), added=tuple(added))
+
+	def __layerDelta(self, index: int, window: dict[int, ConnectivityGraph]) -> LayerDelta:
+		hIndex = cast(int, self.history[index].hIndex)
+		nodes = self.__layers[index]
+		edges: list[tuple[NxUtils.Id, NxUtils.Id]] = []
+		for (frm, to) in self.__edgesInto(hIndex, nodes):
+			if frm.hIndex in window: edges.append((frm, to))
+		return LayerDelta(
+			hIndex=hIndex,
+			nodes=tuple((id_, Predicates(self.__getPredicates(id_))) for id_ in nodes),
+			edges=tuple(edges),
+		)
+
+	def __edgesInto(self, hIndex: int, nodes: set[NxUtils.Id]) -> Iterable[tuple[NxUtils.Id, NxUtils.Id]]:
+		if self.__compact is not None: return ((frm, to) for (frm, to, _) in self.__compact.edges([hIndex]))
+		return cast(Iterable[tuple[NxUtils.Id, NxUtils.Id]], self.in_edges(nodes))
+
+	def __getPredicates(self, id_: NxUtils.Id) -> Predicates:
+		if self.__compact is not None: return self.__compact.getContent(id_, "predicates")
+		return self.getContent(id_, "predicates")
 
 	def addNode(self, id: NxUtils.Id, cGraph: ConnectivityGraph) -> NxUtils.Id:
 		assert cGraph.hIndex is not None and cGraph.hIndex > -1, f"Unset hIndex is not allowed in ShadowTree: cGraph = {repr(cGraph)}, hIndex = {cGraph.hIndex}"
 		content = cGraph.getContent(id)
 		id = id.copy(hIndex=cGraph.hIndex)
-		content = MetricIGraph.NodeData.extend(data=content, subset=cGraph.hIndex)
+		if self.__compact is not None: return self.__compact.addNode(id=id, content=content)
 		return super().addNode(id=id, content=content)
 
 	def addEdge(self, fromId: NxUtils.Id, toId: NxUtils.Id, fromCGraph: ConnectivityGraph, toCGraph: ConnectivityGraph) -> None:
 		fromId = fromId.copy(hIndex=fromCGraph.hIndex)
 		toId = toId.copy(hIndex=toCGraph.hIndex)
 		content = NxUtils.EdgeData(isTemporal=fromCGraph.timeNanoSecs != toCGraph.timeNanoSecs)
+		if self.__compact is not None: return self.__compact.addEdge(fromId, toId, addReverseEdge=False, content=content)
 		return super().addEdge(fromId, toId, addReverseEdge=False, content=content)
 
 	def __getNodeRenderZOffset(self, type_: StaticPolygon.Type | SensingPolygon.Type | AffinePolygon.Type | DynamicPolygon.Type) -> float:
@@ -197,19 +225,16 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 		self.history[-1].render()
 		return
 
-	def __shadowsAreConnectedTemporally(self, pastGraph: ConnectivityGraph, nowGraph: ConnectivityGraph, pastPoly: MapPolygon, nowPoly: MapPolygon) -> bool:
+	def __sweptBySensors(self, pastGraph: ConnectivityGraph, nowGraph: ConnectivityGraph) -> Shapely.AnyObj | None:
 		"""
-			With the assumption that previousNode and currentNode intersect,
-			 1. takes the intersection
-			 2. finds the polygon made by the transformation of each edge
-			 3. takes the union of those polygons to get the area swept by FOV
-			 4. if the intersection has areas that are not swept by FOV, then they are connected
+			The area swept by the sensors between `pastGraph` and `nowGraph`, as a single prepared geometry.
+			The area only depends on the pair of graphs, so it is computed once per transition and reused for every pair of shadows.
+			`None` means the area could not be computed.
 		"""
+		if self.__sweptCache is not None and self.__sweptCache[0] is pastGraph and self.__sweptCache[1] is nowGraph:
+			return self.__sweptCache[2]
+		swept: Shapely.AnyObj | None = None
 		try:
-			intersectionOfShadows = GeometryLib.intersection(pastPoly.interior, nowPoly.interior)
-			intersectionOfShadows = GeometryLib.filterPolygons(intersectionOfShadows)
-			if len(intersectionOfShadows) == 0: return False
-			intersectionOfShadows = GeometryLib.union(intersectionOfShadows)
 			objs = []
 			for nowSensor in nowGraph.sensors:
 				if pastGraph.hasSensor(nowSensor.id):
@@ -232,10 +257,31 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 						for p in subParts: objs.append(p)
 				else:
 					objs.append(nowSensor.interior)
-			objs = objs if len(objs) > 0 else [Shapely.Polygon()]
-			sweptBySensors = Shapely.GeometryCollection(geoms=objs)
-			remainingShadows = GeometryLib.difference(intersectionOfShadows, sweptBySensors)
-			if len(remainingShadows) > 0: return True
+			swept = GeometryLib.union(objs) if len(objs) > 0 else Shapely.Polygon()
+			Shapely.prepare(swept)
+		except Exception as e:
+			from traceback import format_exc
+			Ros.Log(f"Error in computing the area swept by sensors -- {e}\n{format_exc()}")
+		self.__sweptCache = (pastGraph, nowGraph, swept)
+		return swept
+
+	def __shadowsAreConnectedTemporally(self, pastGraph: ConnectivityGraph, nowGraph: ConnectivityGraph, pastPoly: MapPolygon, nowPoly: MapPolygon) -> bool:
+		"""
+			With the assumption that previousNode and currentNode intersect,
+			 1. takes the intersection
+			 2. gets the area swept by FOV, see `__sweptBySensors()`
+			 3. if the intersection has areas that are not swept by FOV, then they are connected
+		"""
+		try:
+			sweptBySensors = self.__sweptBySensors(pastGraph, nowGraph)
+			if sweptBySensors is None: return False
+			intersectionOfShadows = GeometryLib.intersection(pastPoly.interior, nowPoly.interior)
+			intersectionOfShadows = GeometryLib.filterPolygons(intersectionOfShadows)
+			if len(intersectionOfShadows) == 0: return False
+			intersectionOfShadows = GeometryLib.union(intersectionOfShadows)
+			if sweptBySensors.covers(intersectionOfShadows): return False
+			remainingShadows = intersectionOfShadows.difference(sweptBySensors, grid_size=GeometryLib.EPSILON)
+			if len(GeometryLib.filterPolygons(remainingShadows)) > 0: return True
 		except Exception as e:
 			from traceback import format_exc
 			Ros.Log(f"Error in X-Connection Test -- {e}\n{format_exc()}")
@@ -243,8 +289,8 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 
 	def __connectTopLayerTemporally(self) -> None:
 		Ros.Log(" ------------------------------- CONNECT-TEMPORALLY - START -----------------------------")
-		fromGraph = self.history[self.depth - 2]
-		toGraph = self.history[self.depth - 1]
+		fromGraph = self.history[-2]
+		toGraph = self.history[-1]
 		assert toGraph.hIndex is not None, f"Cannot connect graph with unset hIndex in I-graph. {repr(toGraph)}"
 		# Add temporal edges between FOVs
 		Ros.Log(" ------------------------------- CONNECT-Z -------------------------------")
@@ -253,7 +299,6 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 			if fromPoly.type != SensingPolygon.type: continue
 			if not fromPoly.hasTrack: continue
 			for toNodeId in toGraph.nodes:
-				if fromNodeId == toNodeId: continue
 				toPoly = toGraph.getContent(toNodeId, "polygon")
 				if toPoly.type != SensingPolygon.type: continue
 				if not toPoly.hasTrack: continue
@@ -265,7 +310,6 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 			if not fromPoly.isAccessible: continue
 			if fromPoly.type == SensingPolygon.type: continue
 			for toNodeId in toGraph.nodes:
-				if fromNodeId == toNodeId: continue
 				toPoly = toGraph.getContent(toNodeId, "polygon")
 				if not toPoly.isAccessible: continue
 				if toPoly.type == SensingPolygon.type: continue
@@ -276,26 +320,37 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 		Ros.Log(" ------------------------------- CONNECT-TEMPORALLY - END -------------------------------")
 		return
 
-	def __removeFromHistory(self, index: int, delete: bool) -> None:
-		assert index >= 0 and index < len(self.history), f"Index out of history bounds: index = {index}, Len = {len(self.history)}"
-		hIndex = self.history[index].hIndex
-		assert hIndex is not None, f"Graph with unset hIndex found in I-graph. {repr(self.history[index])}"
+	def __removeLayerNodes(self, graph: ConnectivityGraph, nodes: set[NxUtils.Id]) -> None:
+		Ros.Log(f"Removing Graph: {repr(graph)} with {len(nodes)} nodes.")
+		if self.__compact is not None: self.__compact.removeLayer(cast(int, graph.hIndex))
+		else: self.remove_nodes_from(nodes)
+		return
+
+	def __evictOldestLayer(self) -> None:
+		self.__removeLayerNodes(self.history.popleft(), self.__layers.popleft())
+		return
+
+	def __clearTopLayer(self) -> None:
+		self.__removeLayerNodes(self.history[-1], self.__layers[-1])
+		self.__layers[-1] = set()
+		return
 
-		Ros.Log(f"Removing Graph: {repr(self.history[index])} with {len(self.history[index].nodes)} nodes.")
-		polyId: NxUtils.Id
-		for polyId in self.history[index].nodes:
-			id_ = NxUtils.Id(hIndex=hIndex, timeNanoSecs=polyId.timeNanoSecs, regionId=polyId.regionId, polygonId=polyId.polygonId, subPartId=polyId.subPartId)
-			self.removeNode(id_)
-		if delete: self.history.pop(index)
+	def __render(self) -> None:
+		if self.__compact is None: return self.render()
+		if Ros.IsProfiling() or self.rVizPublisher is None: return
+		self.topLayers(self.depth).render()
+		return
 
 	def __isIsomorphic(self, graph: ConnectivityGraph) -> dict[str, str] | None:
+		"""If `graph` is isomorphic to the top layer, returns the mapping between their I-graph node ids, i.e., in the top layer."""
 		if self.depth == 0: return None
 		matcher = NxUtils.GraphMatcher(self.history[-1], graph, self.__ISOMORPHIC_DISTANCE_LIMIT)
 		if not matcher.is_isomorphic(): return None
 		__iso: dict[NxUtils.Id, NxUtils.Id] = matcher.mapping # pyright: ignore[reportAttributeAccessIssue]
+		hIndex = self.history[-1].hIndex
 		m: dict[str, str] = {}
 		for id_ in __iso:
-			m[id_.stringify()] = __iso[id_].stringify()
+			m[id_.copy(hIndex=hIndex).stringify()] = __iso[id_].copy(hIndex=hIndex).stringify()
 		return m
 
 	def __appendToHistory(self, graph: ConnectivityGraph, eventHandler: Callable[["MetricIGraph", dict | None], None]) -> None:
@@ -309,30 +364,30 @@ class MetricIGraph(NxUtils.Graph[GraphPolygon]):
 			isomorphism = self.__isIsomorphic(graph)
 		if isomorphism is not None:
 			graph.hIndex = self.history[-1].hIndex
-			isomorphism = self.__isIsomorphic(graph)
-			self.__removeFromHistory(self.depth - 1, False)
+			self.__clearTopLayer()
 			Ros.Log(f"REPLACE graph with {len(graph.shadows)} shadows and {len(graph.antiShadows)} anti-shadows.")
 			# graph.logGraphNodes()
 			self.history[-1] = graph
 		else:
 			Ros.Log(f"APPENDING graph with {len(graph.shadows)} shadows and {len(graph.antiShadows)} anti-shadows.")
 			graph.hIndex = 0 if self.depth == 0 else cast(int, self.history[-1].hIndex) + 1
+			if self.depth == self.__MAX_HISTORY:
+				Ros.Log(f"History depth is at MAX={self.__MAX_HISTORY} graphs.")
+				self.__evictOldestLayer()
 			self.history.append(graph)
+			self.__layers.append(set())
 
 		for id_ in graph.nodes:
 			id_ = cast(NxUtils.Id, id_)
-			id_ = self.addNode(id_, graph)
-			poly = self.getContent(id_, "polygon")
+			poly = graph.getContent(id_, "polygon")
 			if poly.type == SensingPolygon.type: shouldBroadcastEvent = True
+			self.__layers[-1].add(self.addNode(id_, graph))
 		for edge in graph.edges:
 			self.addEdge(edge[0], edge[1], graph, graph)
 
 		if self.depth > 1: self.__connectTopLayerTemporally()
-		if self.depth > self.__MAX_HISTORY:
-			Ros.Log(f"History depth is more than MAX={self.__MAX_HISTORY} graphs.")
-			self.__removeFromHistory(0, True)
 		if shouldBroadcastEvent: eventHandler(self, isomorphism)
-		self.render()
+		self.__render()
 		return
 
 	def __updateCTRs(self, poly: GraphPolygon) -> ContinuousTimePolygon[GraphPolygon] | None:
@@ -10,6 +10,7 @@ package_name = Path(__file__).parent.parent.name
 
 def generate_launch_description():
 	rdfYamlPath = os.path.join(get_package_share_directory(package_name), "config", "rdf.yaml")
+	csMgrYamlPath = os.path.join(get_package_share_directory(package_name), "config", "cs_mgr.yaml")
 
 	return LaunchDescription([
 		Node(
@@ -22,6 +23,7 @@ def generate_launch_description():
 				"--log-level",
 				"warn",
 			],
+			parameters=[csMgrYamlPath],
 		),
 		Node(
 			package=package_name,
@@ -0,0 +1,28 @@
+import os
+from pathlib import Path
+
+from ament_index_python.packages import get_package_share_directory
+from launch_ros.actions import Node
+
+from launch import LaunchDescription
+
+package_name = Path(__file__).parent.parent.name
+
+def generate_launch_description():
+	"""The eventifier and the BA in one process, in place of their own launch files."""
+	baYamlPath = os.path.join(get_package_share_directory("rt_bi_behavior"), "config", "ba.yaml")
+	eventifierYamlPath = os.path.join(get_package_share_directory("rt_bi_eventifier"), "config", "ev.yaml")
+
+	return LaunchDescription([
+		Node(
+			package=package_name,
+			executable="EV_BA",
+			arguments= [
+				"ba1",
+				"--ros-args",
+				"--log-level",
+				"warn",
+			],
+			parameters=[baYamlPath, eventifierYamlPath],
+		),
+	])
@@ -9,9 +9,12 @@ class ColdStartManager(RtBiNode):
 	def __init__(self, **kwArgs) -> None:
 		newKw = { "node_name": "cs_mgr", "loggingSeverity": Ros.LoggingSeverity.INFO, **kwArgs}
 		super().__init__(**newKw)
+		self.__baNodes: list[str] = []
+		self.declareParameters()
+		self.parseParameters()
 		self.__awaitingColdStart: list[str] = [
 			# The order in this list is significant
-			"/rt_bi_behavior/ba1",
+			*self.__baNodes,
 			"/rt_bi_emulator/dynamic_map",
 			"/rt_bi_eventifier/eventifier",
 		]
@@ -67,9 +70,14 @@ class ColdStartManager(RtBiNode):
 		return
 
 	def declareParameters(self) -> None:
+		# The BA nodes, or the BA host, that are launched. Each one blocks until it is cold started.
+		self.declare_parameter("baNodes", ["/rt_bi_behavior/ba1"])
 		return
 
 	def parseParameters(self) -> None:
+		self.__baNodes = list(self.get_parameter("baNodes").get_parameter_value().string_array_value)
+		for nodeName in self.__baNodes:
+			assert nodeName.startswith(RtBiInterfaces.BA_NODE_PREFIX), f"BA node {nodeName} is not under {RtBiInterfaces.BA_NODE_PREFIX}."
 		return
 
 	def render(self) -> None:
@@ -0,0 +1,37 @@
+import sys
+
+import rclpy
+from rclpy.parameter import Parameter
+from rclpy.utilities import remove_ros_args
+
+from rt_bi_behavior.BaNode import BaNode
+from rt_bi_commons.Base.RtBiNode import RtBiNode
+from rt_bi_eventifier.Eventifier import Eventifier
+
+
+def main(args=None) -> None:
+	"""
+	Runs the eventifier and the BA nodes in a single process, where the I-graph deltas are handed over in memory.
+	The names of the BA nodes are given as the non-ROS arguments, e.g. `EV_BA ba1 ba2 --ros-args --params-file ...`.
+	The nodes read their parameters from the same files as their standalone counterparts.
+	"""
+	rclpy.init(args=args)
+	baNames = remove_ros_args(args if args is not None else sys.argv)[1:]
+	if len(baNames) == 0: baNames = ["ba1"]
+	intraProcess = Parameter("intraProcess", value=True)
+	nodes: list[RtBiNode] = []
+	# Nodes block in their constructors until they are permitted to cold start, BAs go first.
+	for baName in baNames:
+		nodes.append(BaNode(node_name=baName, namespace="rt_bi_behavior", parameter_overrides=[intraProcess]))
+	nodes.append(Eventifier(namespace="rt_bi_eventifier", parameter_overrides=[intraProcess]))
+	executor = RtBiNode.CreateExecutor(max(node.executorThreads for node in nodes))
+	for node in nodes: executor.add_node(node)
+	try:
+		executor.spin()
+	except KeyboardInterrupt as e:
+		pass
+	for node in nodes: node.destroy_node()
+	return
+
+if __name__ == "__main__":
+	main()
@@ -57,7 +57,7 @@ class PredicateToQueryStr:
 		transitionGrammarFileName: str,
 	) -> None:
 		super().__init__()
-		self.__transitionParser = TransitionParser(baseDir, transitionGrammarDir, transitionGrammarFileName)
+		self.__transitionParser = TransitionParser.Get(baseDir, transitionGrammarDir, transitionGrammarFileName)
 		return
 
 	def __propSeqToVariableName(self, variables: list[str]) -> str:
@@ -60,6 +60,7 @@ class RdfStoreNode(DataDictionaryNode[_Parameters]):
 		self.__baseDir = get_package_share_directory(package_name)
 		self.__httpInterface = FusekiInterface(self, self["fuseki_server"][0], self["rdf_store"][0])
 		self.__predicateToIndex: dict[str, int] = {}
+		self.__sparqlXfmr = PredicateToQueryStr(self.__baseDir, self["transition_grammar_dir"][0], self["transition_grammar_file"][0])
 		RtBiInterfaces.createSpaceTimeService(self, self.__onSpaceTimeRequest)
 
 	def __joinList(self, l: list[str], separator: str) -> str:
@@ -107,10 +108,9 @@ class RdfStoreNode(DataDictionaryNode[_Parameters]):
 		variables: list[str] = []
 		binds: list[str] = []
 		orders: list[str] = []
-		sparqlXfmr = PredicateToQueryStr(self.__baseDir, self["transition_grammar_dir"][0], self["transition_grammar_file"][0])
 		for predicate in payload.predicates:
 			if predicate not in self.__predicateToIndex: self.__predicateToIndex[predicate] = len(self.__predicateToIndex)
-			(extractedSelector, extractedVars, extractedBindings) = sparqlXfmr.transformPredicate(predicate, self.__predicateToIndex[predicate])
+			(extractedSelector, extractedVars, extractedBindings) = self.__sparqlXfmr.transformPredicate(predicate, self.__predicateToIndex[predicate])
 			if extractedVars == "" and extractedSelector == "": continue
 			predicateMapping[predicate] = extractedVars
 			variables.append(extractedVars)
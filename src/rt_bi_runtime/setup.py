@@ -29,7 +29,8 @@ setup(
 	entry_points={
 		"console_scripts": [
 			"DD_RDF = rt_bi_runtime.RdfStoreNode:main",
-			"CS_MGR = rt_bi_runtime.ColdStartManager:main"
+			"CS_MGR = rt_bi_runtime.ColdStartManager:main",
+			"EV_BA = rt_bi_runtime.InProcessRuntime:main",
 		],
 	},
 )